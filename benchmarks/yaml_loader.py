@@ -0,0 +1,125 @@
+"""
+Compare the Python and libyaml loaders of Enhanced Templates on a config tree.
+
+Usage: python benchmarks/yaml_loader.py /path/to/config [--repeat 5]
+
+Every YAML file in the tree is scanned and constructed with both loaders.
+Tags like !include and !secret are not followed, so only the YAML parsing is
+measured. Files starting with the enhanced templates tag are skipped, as they
+are Jinja templates until they are rendered.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.enhanced_templates.const import YAML_TAG  # noqa: E402
+from custom_components.enhanced_templates.yaml_parser import (  # noqa: E402
+    EnhancedFastLoader,
+    EnhancedLoader,
+)
+from homeassistant.util.yaml import loader as hass_loader  # noqa: E402
+
+yaml = hass_loader.yaml
+
+# Tags added by enhanced templates on top of the ones of HA.
+ENHANCED_TAGS = [
+    "!file",
+    "!include",
+    "!include_dir_list",
+    "!include_dir_merge_list",
+    "!include_dir_named",
+]
+
+
+def _ignore_tag(loader: Any, node: yaml.Node) -> None:
+    """Construct tags that load other files or secrets as nothing."""
+
+    return None
+
+
+def _benchmark_loader(loader_class: type) -> type:
+    """Loader that constructs the HA and enhanced templates tags as nothing."""
+
+    class BenchmarkLoader(loader_class):
+        pass
+
+    BenchmarkLoader.yaml_constructors = {**EnhancedLoader.yaml_constructors}
+    for tag in [*BenchmarkLoader.yaml_constructors, *ENHANCED_TAGS]:
+        if tag is not None and tag.startswith("!"):
+            BenchmarkLoader.add_constructor(tag, _ignore_tag)
+
+    return BenchmarkLoader
+
+
+def find_files(config_dir: str) -> List[str]:
+    """YAML files in the config directory that are not templates."""
+
+    paths = []
+
+    for root, dirs, files in os.walk(config_dir):
+        dirs[:] = [dir for dir in dirs if not dir.startswith(".")]
+        for file in sorted(files):
+            if not file.endswith(".yaml"):
+                continue
+            path = os.path.join(root, file)
+            with open(path, encoding="utf-8") as f:
+                if f.readline().lower().startswith(YAML_TAG):
+                    continue
+            paths.append(path)
+
+    return paths
+
+
+def run(paths: List[str], loader_factory: Callable, repeat: int) -> float:
+    """Best time in seconds to load all files."""
+
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            with open(path, encoding="utf-8") as stream:
+                yaml.load(stream, Loader=loader_factory)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("config_dir", help="Home Assistant config directory")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per loader")
+    options = parser.parse_args()
+
+    if EnhancedFastLoader is None:
+        sys.exit("libyaml is not available, install PyYAML with libyaml support")
+
+    python_loader = _benchmark_loader(EnhancedLoader)
+    fast_loader = _benchmark_loader(EnhancedFastLoader)
+
+    paths = []
+    for path in find_files(options.config_dir):
+        try:
+            with open(path, encoding="utf-8") as stream:
+                yaml.load(stream, Loader=python_loader)
+        except yaml.YAMLError as exc:
+            print(f"Skipping {path}: {exc}", file=sys.stderr)
+            continue
+        paths.append(path)
+
+    python_time = run(paths, python_loader, options.repeat)
+    fast_time = run(paths, fast_loader, options.repeat)
+
+    print(f"Files:   {len(paths)}")
+    print(f"Python:  {python_time * 1000:.1f} ms")
+    print(f"libyaml: {fast_time * 1000:.1f} ms")
+    print(f"Speedup: {python_time / fast_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
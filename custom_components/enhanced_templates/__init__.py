@@ -7,15 +7,24 @@ https://github.com/jayknott/hass_enhanced_templates
 import voluptuous as vol
 
 from homeassistant.core import HomeAssistant
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import CONF_FAST_LOADER, CONF_PROFILE, DOMAIN
 from .setup import (
     async_setup as yaml_setup,
     async_setup_entry as ui_setup,
 )
 
-CONFIG_SCHEMA = vol.Schema({DOMAIN: {}}, extra=vol.ALLOW_EXTRA)
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: {
+            vol.Optional(CONF_FAST_LOADER, default=False): cv.boolean,
+            vol.Optional(CONF_PROFILE, default=False): cv.boolean,
+        }
+    },
+    extra=vol.ALLOW_EXTRA,
+)
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -7,6 +7,24 @@ TITLE = "Enhanced Templates"
 
 DEFAULT_AREA_ICON = "mdi:square-rounded-outline"
 
+# Maximum size in bytes of the compiled template cache in .storage
+BYTECODE_CACHE_MAX_SIZE = 50 * 1024 * 1024
+
+# Directories in the config directory not searched for templates to precompile
+WARM_UP_SKIP_DIRS = {"custom_components", "deps", "node_modules", "tts", "www"}
+
+# Number of threads loading the files of the include directory tags
+INCLUDE_DIR_WORKERS = 4
+
+# Maximum number of parsed YAML files kept in memory
+YAML_CACHE_SIZE = 500
+
+# Seconds a render in a worker thread waits for the event loop to look up registry data
+SNAPSHOT_TIMEOUT = 30
+
+# Number of recent render times kept per template when profiling
+PROFILE_SAMPLES = 1000
+
 ###########################################
 ### These constants should not be touched.
 ###########################################
@@ -20,6 +38,7 @@ PLATFORM_INPUT_BOOLEAN = "input_boolean"
 PLATFORM_INPUT_NUMBER = "input_number"
 PLATFORM_INPUT_SELECT = "input_select"
 PLATFORM_INPUT_TEXT = "input_text"
+PLATFORM_NOTIFY = "notify"
 PLATFORM_PERSON = "person"
 
 BUILT_IN_AREA_ICON = "area_icon"
@@ -73,13 +92,17 @@ CONF_ENTITIES = "entities"
 CONF_ENTITY = "entity"
 CONF_ENTITY_PLATFORM = "entity_platform"
 CONF_ENTITY_TYPE = "entity_type"
+CONF_FAST_LOADER = "fast_loader"
 CONF_MISSING_RESOURCES = "missing_resources"
+CONF_NEW = "new"
+CONF_OLD = "old"
 CONF_ORIGINAL_AREA_ID = "original_area_id"
 CONF_ORIGINAL_ENTITY_TYPE = "original_entity_type"
 CONF_ORIGINAL_NAME = "original_name"
 CONF_ORIGINAL_TYPE = "original_type"
 CONF_PERSON = "person"
 CONF_PERSONS = "persons"
+CONF_PROFILE = "profile"
 CONF_REMOVE = "remove"
 CONF_SECURITY = "security"
 CONF_SELECTED_AREA = "selected_area"
@@ -116,6 +139,14 @@ SERVICE_IDS = {
     SERVICE_SET_PERSON: f"{DOMAIN}.{SERVICE_SET_PERSON}",
 }
 
+# Entity IDs templates track to render again when a registry changes. No states
+# are written for them, their state change listeners are called directly.
+TRACKING_ENTITY_IDS = {
+    CONF_AREAS: f"{DOMAIN}.{CONF_AREAS}",
+    CONF_ENTITIES: f"{DOMAIN}.{CONF_ENTITIES}",
+    CONF_PERSONS: f"{DOMAIN}.{CONF_PERSONS}",
+}
+
 TRANSLATIONS_PATH = "translations/"
 
 YAML_TAG = f"# {DOMAIN}"
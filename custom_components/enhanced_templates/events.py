@@ -1,21 +1,58 @@
 """Event listeners and handlers used in this integration."""
-from homeassistant.core import Event
+from typing import Optional
+
+from homeassistant.const import (
+    ATTR_AREA_ID,
+    ATTR_DEVICE_CLASS,
+    ATTR_DOMAIN,
+    ATTR_SERVICE,
+    CONF_ENTITY_ID,
+    CONF_ID,
+    EVENT_SERVICE_REGISTERED,
+    EVENT_SERVICE_REMOVED,
+    EVENT_STATE_CHANGED,
+)
+from homeassistant.core import Event, State, callback
 from homeassistant.helpers.area_registry import EVENT_AREA_REGISTRY_UPDATED
-
-from .registry import update_area_registry
+from homeassistant.helpers.device_registry import EVENT_DEVICE_REGISTRY_UPDATED
+from homeassistant.helpers.entity_registry import EVENT_ENTITY_REGISTRY_UPDATED
+
+from .registry import (
+    invalidate_notify_services,
+    patch_area_registry,
+    patch_service_registry,
+    refresh_device,
+    refresh_entity,
+    sort_area,
+    sort_areas,
+    sort_person,
+    sort_persons,
+    update_entity_on,
+    update_entity_registry,
+)
 
 from .const import (
+    CONF_ACTION,
+    CONF_AREAS,
+    CONF_PERSONS,
     EVENT_AREAS_CHANGED,
     EVENT_AREA_SETTINGS_CHANGED,
     EVENT_ENTITY_SETTINGS_CHANGED,
     EVENT_PERSON_SETTINGS_CHANGED,
+    PLATFORM_NOTIFY,
 )
 from .settings import (
     update_area_settings,
     update_entity_settings,
     update_person_settings,
 )
-from .share import get_hass
+from .share import get_base, get_hass
+from .tracking import registry_changed
+
+ATTR_DEVICE_ID = "device_id"
+ATTR_NEW_STATE = "new_state"
+ATTR_OLD_ENTITY_ID = "old_entity_id"
+ATTR_OLD_STATE = "old_state"
 
 
 async def setup_events() -> None:
@@ -25,15 +62,21 @@ async def setup_events() -> None:
 
     listen(EVENT_AREA_REGISTRY_UPDATED, handle_area_registry_updated)
     listen(EVENT_AREA_SETTINGS_CHANGED, handle_area_settings_changed)
+    listen(EVENT_DEVICE_REGISTRY_UPDATED, handle_device_registry_updated)
+    listen(EVENT_ENTITY_REGISTRY_UPDATED, handle_entity_registry_updated)
     listen(EVENT_ENTITY_SETTINGS_CHANGED, handle_entity_settings_changed)
     listen(EVENT_PERSON_SETTINGS_CHANGED, handle_person_settings_changed)
+    listen(EVENT_SERVICE_REGISTERED, handle_service_changed)
+    listen(EVENT_SERVICE_REMOVED, handle_service_changed)
+    listen(EVENT_STATE_CHANGED, handle_state_changed, filter_state_changed)
 
 
 async def handle_area_registry_updated(event: Event) -> None:
     """Handle when an area is updated in the registry."""
 
-    update_area_registry()
-    get_hass().bus.fire(EVENT_AREAS_CHANGED)
+    diff = patch_area_registry(event.data[CONF_ACTION], event.data[ATTR_AREA_ID])
+    registry_changed(CONF_AREAS)
+    get_hass().bus.async_fire(EVENT_AREAS_CHANGED, diff)
 
 
 async def handle_area_settings_changed(event: Event) -> None:
@@ -41,14 +84,104 @@ async def handle_area_settings_changed(event: Event) -> None:
 
     await update_area_settings()
 
+    if ATTR_AREA_ID in event.data:
+        sort_area(event.data[ATTR_AREA_ID])
+    else:
+        sort_areas()
+
+    registry_changed(CONF_AREAS)
+
+
+@callback
+def handle_device_registry_updated(event: Event) -> None:
+    """Handle when a device is updated in the registry."""
+
+    refresh_device(event.data[ATTR_DEVICE_ID])
+
+
+@callback
+def handle_entity_registry_updated(event: Event) -> None:
+    """Handle when an entity is updated in the registry."""
+
+    entity_ids = [event.data[CONF_ENTITY_ID], event.data.get(ATTR_OLD_ENTITY_ID)]
+
+    for entity_id in entity_ids:
+        if entity_id is None:
+            continue
+
+        refresh_entity(entity_id)
+
+        # Notify services are derived from the registry entries of device trackers.
+        person_id = get_base().device_tracker_persons.get(entity_id)
+        if person_id is not None:
+            invalidate_notify_services(person_id)
+
 
 async def handle_entity_settings_changed(event: Event) -> None:
     """Handle when entity settings have been updated."""
 
     await update_entity_settings()
 
+    if CONF_ENTITY_ID in event.data:
+        refresh_entity(event.data[CONF_ENTITY_ID])
+    else:
+        update_entity_registry()
+
 
 async def handle_person_settings_changed(event: Event) -> None:
     """Handle when person settings have been updated."""
 
     await update_person_settings()
+
+    if CONF_ID in event.data:
+        sort_person(event.data[CONF_ID])
+    else:
+        sort_persons()
+
+    registry_changed(CONF_PERSONS)
+
+
+@callback
+def handle_service_changed(event: Event) -> None:
+    """Handle when a service is registered or removed."""
+
+    patch_service_registry(
+        event.data[ATTR_DOMAIN],
+        event.data[ATTR_SERVICE],
+        event.event_type == EVENT_SERVICE_REGISTERED,
+    )
+
+    if event.data.get(ATTR_DOMAIN) == PLATFORM_NOTIFY:
+        invalidate_notify_services()
+
+
+@callback
+def filter_state_changed(event: Event) -> bool:
+    """
+    Update the counters when the state of an entity changes. Filters run while
+    the event is fired, before any listener, so templates that render on the
+    same change already see the new counts. Returns if the entity also has to
+    be indexed again.
+    """
+
+    old_state: Optional[State] = event.data.get(ATTR_OLD_STATE)
+    new_state: Optional[State] = event.data.get(ATTR_NEW_STATE)
+
+    update_entity_on(event.data[CONF_ENTITY_ID], new_state)
+
+    # Only added or removed entities and changes to the device class or name
+    # affect the indexes and sorted views.
+    return (
+        old_state is None
+        or new_state is None
+        or old_state.name != new_state.name
+        or old_state.attributes.get(ATTR_DEVICE_CLASS)
+        != new_state.attributes.get(ATTR_DEVICE_CLASS)
+    )
+
+
+@callback
+def handle_state_changed(event: Event) -> None:
+    """Handle when an entity is added or removed, or its name or device class changes."""
+
+    refresh_entity(event.data[CONF_ENTITY_ID])
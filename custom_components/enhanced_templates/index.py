@@ -0,0 +1,226 @@
+"""Indexes used to speed up lookups in the registries."""
+from bisect import bisect_left, insort
+import re
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+from homeassistant.helpers.area_registry import AreaEntry
+
+
+class AreaNameMatcher:
+    """Match the beginning of an object ID against all slugified area names."""
+
+    def __init__(self, areas: Iterable[AreaEntry]) -> None:
+        self.area_ids: Dict[str, str] = {}
+        self.pattern: Optional[Pattern] = None
+
+        for area in areas:
+            name = area.name.lower().replace(" ", "_")
+            for slug in (name.replace("'", ""), name.replace("'", "_")):
+                if slug != "" and slug not in self.area_ids:
+                    self.area_ids[slug] = area.id
+
+        if len(self.area_ids) == 0:
+            return
+
+        # Longest names first so the longest matching area name wins.
+        slugs = sorted(self.area_ids, key=len, reverse=True)
+        self.pattern = re.compile(
+            f"(?:all_)?({'|'.join(re.escape(slug) for slug in slugs)})(?:_|$)"
+        )
+
+    def match(self, object_id: str) -> Optional[str]:
+        """Area ID of the longest area name at the beginning of the object ID."""
+
+        if self.pattern is None:
+            return None
+
+        match = self.pattern.match(object_id)
+
+        return self.area_ids[match.group(1)] if match is not None else None
+
+
+class AttributeIndex:
+    """Map the values of an attribute to the IDs of the objects with that value."""
+
+    def __init__(self) -> None:
+        self._ids: Dict[Any, Set[str]] = {}
+        self._values: Dict[str, Any] = {}
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._values))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, value: Any) -> FrozenSet[str]:
+        """IDs of all objects with a value."""
+
+        return frozenset(self._ids.get(value, ()))
+
+    def value(self, id: str, default: Any = None) -> Any:
+        """Indexed value for an ID."""
+
+        return self._values.get(id, default)
+
+    def set(self, id: str, value: Any) -> bool:
+        """Index an ID under a value, replacing the previous value. Returns if the index changed."""
+
+        if id in self._values:
+            if self._values[id] == value:
+                return False
+            self.discard(id)
+
+        self._values[id] = value
+        self._ids.setdefault(value, set()).add(id)
+
+        return True
+
+    def discard(self, id: str) -> bool:
+        """Remove an ID from the index if it exists. Returns if the index changed."""
+
+        if id not in self._values:
+            return False
+
+        value = self._values.pop(id)
+        ids = self._ids[value]
+        ids.discard(id)
+        if len(ids) == 0:
+            del self._ids[value]
+
+        return True
+
+
+class SortedView:
+    """IDs kept in order of a sort key, updated with bisect insertion."""
+
+    def __init__(self) -> None:
+        self._entries: List[Tuple[Any, str]] = []
+        self._keys: Dict[str, Any] = {}
+        self._ids: Optional[Tuple[str, ...]] = None
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def ids(self) -> Tuple[str, ...]:
+        """All IDs in sorted order."""
+
+        if self._ids is None:
+            self._ids = tuple(id for _, id in self._entries)
+
+        return self._ids
+
+    def set(self, id: str, key: Any) -> bool:
+        """Insert an ID or move it to the position of a new sort key. Returns if the view changed."""
+
+        if id in self._keys:
+            if self._keys[id] == key:
+                return False
+            self.discard(id)
+
+        self._keys[id] = key
+        insort(self._entries, (key, id))
+        self._ids = None
+
+        return True
+
+    def discard(self, id: str) -> bool:
+        """Remove an ID if it exists. Returns if the view changed."""
+
+        if id not in self._keys:
+            return False
+
+        entry = (self._keys.pop(id), id)
+        del self._entries[bisect_left(self._entries, entry)]
+        self._ids = None
+
+        return True
+
+
+class AggregateCounters:
+    """Count tracked and "on" objects per group and type, updated one object at a time."""
+
+    def __init__(self) -> None:
+        self._objects: Dict[str, Tuple[Any, Any, bool]] = {}
+        self._groups: Dict[Any, Dict[Any, List[int]]] = {}
+        self._types: Dict[Any, List[int]] = {}
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._objects
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._objects))
+
+    def set(self, id: str, group: Any, type: Any, on: bool) -> None:
+        """Count an object in a group and type, replacing its previous counts."""
+
+        if self._objects.get(id) == (group, type, on):
+            return
+
+        self.discard(id)
+        self._objects[id] = (group, type, on)
+        self._add(group, type, 1, int(on))
+
+    def set_on(self, id: str, on: bool) -> None:
+        """Update whether a counted object is on."""
+
+        if id not in self._objects:
+            return
+
+        group, type, was_on = self._objects[id]
+        if was_on == on:
+            return
+
+        self._objects[id] = (group, type, on)
+        self._add(group, type, 0, 1 if on else -1)
+
+    def discard(self, id: str) -> None:
+        """Stop counting an object if it is counted."""
+
+        if id not in self._objects:
+            return
+
+        group, type, on = self._objects.pop(id)
+        self._add(group, type, -1, -int(on))
+
+    def group(self, group: Any) -> Dict[Any, Tuple[int, int]]:
+        """Counts of tracked and on objects per type in a group."""
+
+        return {
+            type: (count, on)
+            for type, (count, on) in self._groups.get(group, {}).items()
+        }
+
+    def types(self) -> Dict[Any, Tuple[int, int]]:
+        """Counts of tracked and on objects per type across all groups."""
+
+        return {type: (count, on) for type, (count, on) in self._types.items()}
+
+    def _add(self, group: Any, type: Any, count: int, on: int) -> None:
+        types = self._groups.setdefault(group, {})
+        for counters, key in ((types, type), (self._types, type)):
+            counter = counters.setdefault(key, [0, 0])
+            counter[0] += count
+            counter[1] += on
+            if counter[0] == 0:
+                del counters[key]
+
+        if len(types) == 0:
+            del self._groups[group]
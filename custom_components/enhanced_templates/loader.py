@@ -0,0 +1,222 @@
+"""Template loader that watches template files instead of checking them on every load."""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import threading
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+import weakref
+
+import jinja2
+from jinja2.loaders import split_template_path
+
+from .share import get_log
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover
+    FileSystemEventHandler = object
+    Observer = None
+
+
+class EnhancedFileSystemLoader(jinja2.FileSystemLoader):
+    """
+    File system loader that watches the directories of loaded templates with
+    inotify. A compiled template is kept until its file changes, instead of
+    checking the modification time of the file each time it is loaded. When
+    watchdog is not installed or a directory can not be watched, the loader
+    falls back to checking the modification time.
+    """
+
+    def __init__(self, searchpath: str) -> None:
+        super().__init__(searchpath)
+        self._lock = threading.Lock()
+        self._observer = None
+        self._watched: Dict[str, bool] = {}
+        self._changes = 0
+        self._versions: Dict[str, int] = {}
+        self._loaded: Dict[str, Set[Tuple[weakref.ref, str]]] = {}
+        self._primed: ContextVar[Optional[Tuple[str, str, float]]] = ContextVar(
+            "enhanced_templates_primed_source", default=None
+        )
+
+    def start(self) -> bool:
+        """Start watching template directories. Returns if watching is available."""
+
+        if Observer is None:
+            get_log().debug("watchdog is not installed, checking templates with stat")
+            return False
+
+        try:
+            observer = Observer()
+            observer.daemon = True
+            observer.start()
+        except Exception as exc:  # pylint: disable=broad-except
+            get_log().warning("Unable to watch templates for changes: %s", exc)
+            return False
+
+        self._observer = observer
+        return True
+
+    def stop(self) -> None:
+        """Stop watching template directories."""
+
+        observer, self._observer = self._observer, None
+
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+        with self._lock:
+            self._watched = {}
+
+    @contextmanager
+    def primed(self, template: str, source: str, mtime: float) -> Iterator[None]:
+        """Use a source that was already read from the file when the template is loaded."""
+
+        token = self._primed.set((template, source, mtime))
+
+        try:
+            yield
+        finally:
+            self._primed.reset(token)
+
+    def get_source(
+        self, environment: jinja2.Environment, template: str
+    ) -> Tuple[str, str, Callable[[], bool]]:
+        """Get the source of a template with a check that uses the watched versions."""
+
+        # Watch the directory before reading, so changes after the read are seen.
+        path = self._find(template)
+        watched = path is not None and self._watch(os.path.dirname(path))
+
+        changes = self._changes
+        source, filename, uptodate = self._read_source(environment, template)
+        filename = os.path.normpath(filename)
+
+        if not watched or filename != path:
+            return source, filename, uptodate
+
+        with self._lock:
+            # A file changed while reading, the source may be older than the version.
+            if self._changes != changes:
+                return source, filename, uptodate
+
+            version = self._versions.get(filename, 0)
+            self._loaded.setdefault(filename, set()).add(
+                (weakref.ref(environment), template)
+            )
+
+        def _uptodate() -> bool:
+            if self._observer is None:
+                return uptodate()
+            return self._versions.get(filename, 0) == version
+
+        return source, filename, _uptodate
+
+    def _find(self, template: str) -> Optional[str]:
+        """Find the file of a template in the search path."""
+
+        pieces = split_template_path(template)
+
+        for searchpath in self.searchpath:
+            filename = os.path.join(searchpath, *pieces)
+            if os.path.isfile(filename):
+                return os.path.normpath(filename)
+
+        return None
+
+    def _read_source(
+        self, environment: jinja2.Environment, template: str
+    ) -> Tuple[str, str, Callable[[], bool]]:
+        """Read the source of a template unless it is primed."""
+
+        primed = self._primed.get()
+
+        if primed is None or primed[0] != template:
+            return super().get_source(environment, template)
+
+        _, source, mtime = primed
+        filename = os.path.normpath(
+            os.path.join(self.searchpath[0], *split_template_path(template))
+        )
+
+        # The file changed after it was read, read it again.
+        try:
+            if os.path.getmtime(filename) != mtime:
+                return super().get_source(environment, template)
+        except OSError:
+            return super().get_source(environment, template)
+
+        def uptodate() -> bool:
+            try:
+                return os.path.getmtime(filename) == mtime
+            except OSError:
+                return False
+
+        return source, filename, uptodate
+
+    def changed(self, path: str) -> None:
+        """Invalidate a changed file and drop its compiled templates from the caches."""
+
+        path = os.path.normpath(path)
+
+        with self._lock:
+            self._changes += 1
+            self._versions[path] = self._versions.get(path, 0) + 1
+            loaded = self._loaded.pop(path, set())
+
+        for environment_ref, name in loaded:
+            environment = environment_ref()
+            if environment is None or environment.cache is None:
+                continue
+            try:
+                del environment.cache[(weakref.ref(self), name)]
+            except KeyError:
+                pass
+
+    def _watch(self, directory: str) -> bool:
+        """Watch a directory if it is not watched yet. Returns if it is watched."""
+
+        observer = self._observer
+
+        if observer is None:
+            return False
+
+        watched = self._watched.get(directory)
+        if watched is not None:
+            return watched
+
+        with self._lock:
+            if directory not in self._watched:
+                try:
+                    observer.schedule(_ChangeHandler(self), directory, recursive=False)
+                    self._watched[directory] = True
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Most likely the inotify watch limit.
+                    get_log().debug("Unable to watch %s: %s", directory, exc)
+                    self._watched[directory] = False
+
+            return self._watched[directory]
+
+
+# Events that change the content of a file, newer watchdog versions also report opening files.
+CHANGE_EVENTS = {"created", "deleted", "modified", "moved"}
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Pass file changes in a watched directory on to the loader."""
+
+    def __init__(self, loader: EnhancedFileSystemLoader) -> None:
+        super().__init__()
+        self._loader = loader
+
+    def on_any_event(self, event: "FileSystemEvent") -> None:
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+
+        self._loader.changed(event.src_path)
+
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self._loader.changed(dest_path)
@@ -1,11 +1,17 @@
 """Base Integration class."""
 import logging
-from typing import Dict, Iterable, List, Optional, TypedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, TypedDict
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.area_registry import AreaEntry
 
-from .const import DOMAIN
+from .const import DOMAIN, YAML_CACHE_SIZE
+from .index import AggregateCounters, AreaNameMatcher, AttributeIndex, SortedView
+from .yaml_cache import YAMLCache
+
+if TYPE_CHECKING:
+    from .profiler import RenderProfile
+    from .registry import EnhancedEntity
 
 
 class AreaSettingsEntry(TypedDict, total=False):
@@ -58,7 +64,7 @@ class PersonEntry(TypedDict, total=False):
     picture: Optional[str]
 
 
-PersonRegistry = Iterable[PersonEntry]
+PersonRegistry = Dict[str, PersonEntry]
 
 
 class Configuration:
@@ -75,9 +81,32 @@ class IntegrationBase:
     hass: HomeAssistant = None
     log = logging.getLogger(f"custom_components.{DOMAIN}")
 
-    area_registry: Iterable[AreaEntry] = []
+    area_name_matcher: Optional[AreaNameMatcher] = None
+    area_order: SortedView = SortedView()
+    area_registry: Dict[str, AreaEntry] = {}
     areas: AreaSettingsRegistry = {}
     configuration: Configuration = None
+    device_tracker_persons: Dict[str, str] = {}
     entities: EntitySettingsRegistry = {}
-    person_registry: Iterable[PersonEntry] = []
+    entity_cache: Dict[str, "EnhancedEntity"] = {}
+    entity_counters: AggregateCounters = AggregateCounters()
+    entity_area_index: AttributeIndex = AttributeIndex()
+    entity_device_index: AttributeIndex = AttributeIndex()
+    entity_domain_index: AttributeIndex = AttributeIndex()
+    entity_type_index: AttributeIndex = AttributeIndex()
+    pending_revisions: Set[str] = set()
+    person_notify_services: Dict[str, List[str]] = {}
+    person_registry: PersonRegistry = {}
     persons: PersonSettingsRegistry = {}
+    # Render statistics per template path, None unless profiling is enabled.
+    profiles: Optional[Dict[str, "RenderProfile"]] = None
+    revisions: Dict[str, int] = {}
+    service_ids: Set[str] = set()
+    # Loader class used to parse YAML files.
+    yaml_loader: Optional[type] = None
+    yaml_cache: YAMLCache = YAMLCache(YAML_CACHE_SIZE)
+
+    # Views of all and of visible objects ordered by sort order and name.
+    sorted_areas: Tuple[SortedView, SortedView] = (SortedView(), SortedView())
+    sorted_entities: Tuple[SortedView, SortedView] = (SortedView(), SortedView())
+    sorted_persons: Tuple[SortedView, SortedView] = (SortedView(), SortedView())
@@ -0,0 +1,187 @@
+"""Optional render profiling of enhanced templates."""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PROFILE, PROFILE_SAMPLES
+from .share import get_base, get_hass, get_option
+
+# Path of the template that is rendering, only set while profiling.
+_CURRENT_PATH: ContextVar[Optional[str]] = ContextVar(
+    "enhanced_templates_profile_path", default=None
+)
+
+
+class RenderProfile:
+    """Render statistics of a single template."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.globals_time = 0.0
+        self.load_time = 0.0
+        self.durations: Deque[float] = deque(maxlen=PROFILE_SAMPLES)
+
+    @property
+    def p95(self) -> float:
+        """95th percentile of the most recent render times."""
+
+        if len(self.durations) == 0:
+            return 0.0
+
+        durations = sorted(self.durations)
+        return durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+
+    def add(self, duration: float) -> None:
+        """Record a render."""
+
+        self.count += 1
+        self.total += duration
+        self.durations.append(duration)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Statistics in milliseconds."""
+
+        return {
+            "count": self.count,
+            "total": round(self.total * 1000, 3),
+            "mean": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            "p95": round(self.p95 * 1000, 3),
+            "globals": round(self.globals_time * 1000, 3),
+            "load": round(self.load_time * 1000, 3),
+        }
+
+
+async def setup_profiler() -> None:
+    """Setup profiling if it is enabled in the configuration."""
+
+    if not get_option(CONF_PROFILE, False):
+        return
+
+    get_base().profiles = {}
+
+    register = get_hass().components.websocket_api.async_register_command
+    register(websocket_get_template_profile)
+
+
+def _profile(path: str) -> RenderProfile:
+    profiles = get_base().profiles
+
+    if path not in profiles:
+        profiles[path] = RenderProfile()
+
+    return profiles[path]
+
+
+@contextmanager
+def profile_render(path: str) -> Iterator[None]:
+    """Time the render of a template when profiling is enabled."""
+
+    if get_base().profiles is None:
+        yield
+        return
+
+    token = _CURRENT_PATH.set(path)
+    start = perf_counter()
+
+    try:
+        yield
+    finally:
+        duration = perf_counter() - start
+        _CURRENT_PATH.reset(token)
+        _profile(path).add(duration)
+
+
+@contextmanager
+def profile_load(path: str) -> Iterator[None]:
+    """Time loading and compiling a template, apart from its render."""
+
+    if get_base().profiles is None:
+        yield
+        return
+
+    start = perf_counter()
+
+    try:
+        yield
+    finally:
+        _profile(path).load_time += perf_counter() - start
+
+
+def profile_globals(compute: Callable[[], Any]) -> Any:
+    """Compute a lookup of a registry global, timing it for the rendering template."""
+
+    path = _CURRENT_PATH.get()
+
+    if path is None:
+        return compute()
+
+    start = perf_counter()
+
+    try:
+        return compute()
+    finally:
+        _profile(path).globals_time += perf_counter() - start
+
+
+def profile_stream(iterator: Iterator) -> Iterator:
+    """Time reading a stream of a registry global while the template consumes it."""
+
+    path = _CURRENT_PATH.get()
+
+    if path is None:
+        return iterator
+
+    return _timed_stream(iterator, _profile(path))
+
+
+def _timed_stream(iterator: Iterator, profile: RenderProfile) -> Iterator:
+    while True:
+        start = perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            profile.globals_time += perf_counter() - start
+        yield item
+
+
+def get_template_profiles() -> List[Dict[str, Any]]:
+    """Statistics of all profiled templates, slowest in total first."""
+
+    profiles = get_base().profiles or {}
+
+    return [
+        {"path": path, **profile.as_dict()}
+        for path, profile in sorted(
+            profiles.items(), key=lambda item: item[1].total, reverse=True
+        )
+    ]
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "enhanced_templates_template_profile",
+        vol.Optional("reset", default=False): bool,
+    }
+)
+@websocket_api.async_response
+async def websocket_get_template_profile(
+    hass: HomeAssistant, connection: str, msg: dict
+):
+    """Get the render statistics of all profiled templates."""
+
+    profiles = get_template_profiles()
+
+    if msg["reset"]:
+        get_base().profiles = {}
+
+    connection.send_result(msg["id"], profiles)
@@ -1,6 +1,19 @@
 """Setup and manage area or entity registries."""
+from fnmatch import translate
+from functools import cached_property
 import re
-from typing import Any, Callable, Dict, Iterable, List, Optional, Union, cast
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 import voluptuous as vol
 
 from homeassistant.components import websocket_api
@@ -10,32 +23,55 @@ from homeassistant.components.person import (
 )
 from homeassistant.const import (
     ATTR_AREA_ID,
+    ATTR_DEVICE_CLASS,
     CONF_ICON,
     CONF_ID,
     CONF_NAME,
+    STATE_HOME,
+    STATE_ON,
+    STATE_OPEN,
+    STATE_OPENING,
+    STATE_PLAYING,
+    STATE_UNLOCKED,
 )
 from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers.collection import CHANGE_REMOVED
 from homeassistant.helpers.area_registry import AreaEntry, AreaRegistry
 from homeassistant.helpers.device_registry import DeviceEntry, DeviceRegistry
 from homeassistant.helpers.entity_registry import EntityRegistry, RegistryEntry
 
 from .const import (
+    CONF_ACTION,
+    CONF_COUNT,
+    CONF_ENTITIES,
     CONF_ENTITY_TYPE,
+    CONF_NEW,
+    CONF_OLD,
+    CONF_PERSONS,
+    CONF_REMOVE,
+    CONF_SOMETHING_ON,
     CONF_SORT_ORDER,
     CONF_VISIBLE,
     DEFAULT_AREA_ICON,
     DEFAULT_SORT_ORDER,
     PLATFORM_BINARY_SENSOR,
+    PLATFORM_NOTIFY,
     PLATFORM_PERSON,
 )
+from .index import AggregateCounters, AreaNameMatcher, AttributeIndex, SortedView
 from .model import (
     AreaSettingsEntry,
     EntitySettingsEntry,
     PersonEntry,
-    PersonRegistry,
     PersonSettingsEntry,
 )
 from .share import get_base, get_hass
+from .tracking import (
+    is_tracking_entity_id,
+    registry_changed,
+    track_entity_ids,
+    track_registry,
+)
 
 PLATFORM = PLATFORM_BINARY_SENSOR
 
@@ -45,6 +81,24 @@ SENSOR_CLASS_MAP = {CONF_DEFAULT: "sensor"}
 BINARY_SENSOR_CLASS_MAP = {CONF_DEFAULT: "binary_sensor"}
 COVER_CLASS_MAP = {CONF_DEFAULT: "cover"}
 PLATFORM_MAP = {}
+DEVICE_CLASS_MAPS = {
+    "binary_sensor": BINARY_SENSOR_CLASS_MAP,
+    "cover": COVER_CLASS_MAP,
+    "sensor": SENSOR_CLASS_MAP,
+}
+
+# States that count towards something being on in an area.
+ON_STATES = {
+    STATE_HOME,
+    STATE_ON,
+    STATE_OPEN,
+    STATE_OPENING,
+    STATE_PLAYING,
+    STATE_UNLOCKED,
+}
+
+# Entity types keyed by (domain, device_class), built from the maps above.
+ENTITY_TYPE_TABLE: Dict[Tuple[str, Optional[str]], str] = {}
 
 
 async def setup_registry() -> None:
@@ -52,6 +106,10 @@ async def setup_registry() -> None:
 
     update_registry()
 
+    person_collection = _person_collection()
+    if person_collection is not None:
+        person_collection.async_add_listener(_handle_person_collection_changed)
+
     register = get_hass().components.websocket_api.async_register_command
     register(websocket_get_entity_types)
 
@@ -59,13 +117,299 @@ async def setup_registry() -> None:
 def update_registry() -> None:
     """Update registry."""
 
+    update_entity_type_table()
     update_area_registry()
+    update_person_registry()
+    update_service_registry()
+    update_entity_registry()
+
+
+def update_entity_type_table() -> None:
+    """
+    Rebuild the entity type table from the class and platform maps. This needs
+    to be called, followed by update_entity_registry, when the maps change.
+    """
+
+    ENTITY_TYPE_TABLE.clear()
+
+    for domain, class_map in DEVICE_CLASS_MAPS.items():
+        for device_class, entity_type in class_map.items():
+            if device_class != CONF_DEFAULT:
+                ENTITY_TYPE_TABLE[(domain, device_class)] = entity_type
+        ENTITY_TYPE_TABLE[(domain, None)] = class_map.get(CONF_DEFAULT, domain)
+
+    for domain, entity_type in PLATFORM_MAP.items():
+        if domain != CONF_DEFAULT and domain not in DEVICE_CLASS_MAPS:
+            ENTITY_TYPE_TABLE[(domain, None)] = entity_type
+
+
+def get_entity_type(domain: str, device_class: Optional[str] = None) -> str:
+    """Entity type for a domain and device class from the entity type table."""
+
+    # Only domains with a device class map are classified by device class.
+    key = (domain, device_class if domain in DEVICE_CLASS_MAPS else None)
+    entity_type = ENTITY_TYPE_TABLE.get(key)
+
+    if entity_type is None:
+        if key[1] is not None:
+            entity_type = get_entity_type(domain)
+        else:
+            entity_type = PLATFORM_MAP.get(CONF_DEFAULT, domain)
+        ENTITY_TYPE_TABLE[key] = entity_type
+
+    return entity_type
 
 
 def update_area_registry() -> None:
     """Update area registry."""
 
-    get_base().area_registry = _areas_registry_data()
+    base = get_base()
+    base.area_registry = {}
+    base.area_order = SortedView()
+
+    for area in _area_registry().async_list_areas():
+        base.area_registry[area.id] = area
+        base.area_order.set(area.id, area.name)
+
+    _update_inferred_entity_areas()
+    sort_areas()
+
+
+def patch_area_registry(action: str, area_id: str) -> Dict[str, Any]:
+    """Apply a single change from the HA area registry and return a diff of the change."""
+
+    base = get_base()
+    old_entry = base.area_registry.pop(area_id, None)
+    new_entry = None
+
+    if action != CONF_REMOVE:
+        new_entry = _area_registry().async_get_area(area_id)
+
+    if new_entry is None:
+        base.area_order.discard(area_id)
+    else:
+        base.area_registry[area_id] = new_entry
+        base.area_order.set(area_id, new_entry.name)
+
+    if old_entry is None or new_entry is None or old_entry.name != new_entry.name:
+        _update_inferred_entity_areas()
+
+    sort_area(area_id, new_entry)
+
+    return {
+        CONF_ACTION: action,
+        ATTR_AREA_ID: area_id,
+        CONF_OLD: _area_entry_data(old_entry),
+        CONF_NEW: _area_entry_data(new_entry),
+    }
+
+
+def _area_entry_data(area_entry: Optional[AreaEntry]) -> Optional[Dict[str, Any]]:
+    if area_entry is None:
+        return None
+
+    return {CONF_ID: area_entry.id, CONF_NAME: area_entry.name}
+
+
+def _update_inferred_entity_areas() -> None:
+    """Update the area index after area names changed, areas inferred from entity IDs depend on them."""
+
+    base = get_base()
+    base.area_name_matcher = None
+
+    for entity_id in base.entity_domain_index:
+        entity = get_entity(entity_id)
+        if base.entity_area_index.set(entity_id, entity.area_id):
+            _count_entity(entity)
+            registry_changed(CONF_ENTITIES)
+
+
+def get_area_entries() -> List[AreaEntry]:
+    """Get the HA area registry entries ordered by name."""
+
+    base = get_base()
+
+    return [base.area_registry[area_id] for area_id in base.area_order.ids]
+
+
+def update_person_registry() -> None:
+    """Update person registry and the device tracker index."""
+
+    base = get_base()
+    base.person_registry = {}
+    base.device_tracker_persons = {}
+    base.person_notify_services = {}
+
+    person_collection = _person_collection()
+    persons = person_collection.async_items() if person_collection is not None else []
+
+    for person in cast(Iterable[PersonEntry], persons):
+        _index_person(person)
+
+    sort_persons()
+
+
+def _person_collection() -> Optional[PersonStorageCollection]:
+    """The person collection of HA, None if the person integration is not loaded."""
+
+    data = get_hass().data.get(PLATFORM_PERSON)
+
+    return data[1] if data is not None else None
+
+
+def _index_person(person: PersonEntry) -> None:
+    """Add a person to the person registry and the device tracker index."""
+
+    base = get_base()
+    base.person_registry[person[CONF_ID]] = person
+
+    for device_tracker in person.get(CONF_DEVICE_TRACKERS, []):
+        base.device_tracker_persons.setdefault(device_tracker, person[CONF_ID])
+
+
+def _unindex_person(person_id: str) -> None:
+    """Remove a person from the person registry and the device tracker index."""
+
+    base = get_base()
+    person = base.person_registry.pop(person_id, None)
+
+    if person is None:
+        return
+
+    for device_tracker in person.get(CONF_DEVICE_TRACKERS, []):
+        if base.device_tracker_persons.get(device_tracker) == person_id:
+            del base.device_tracker_persons[device_tracker]
+
+
+async def _handle_person_collection_changed(
+    change_type: str, item_id: str, config: PersonEntry
+) -> None:
+    """Keep the person registry in sync with the HA person collection."""
+
+    _unindex_person(item_id)
+    invalidate_notify_services(item_id)
+
+    if change_type != CHANGE_REMOVED:
+        _index_person(config)
+
+    sort_person(item_id)
+    registry_changed(CONF_PERSONS)
+
+
+def invalidate_notify_services(person_id: Optional[str] = None) -> None:
+    """Forget the notify services of a person or of all persons."""
+
+    base = get_base()
+
+    if person_id is None:
+        base.person_notify_services = {}
+    else:
+        base.person_notify_services.pop(person_id, None)
+
+
+def update_service_registry() -> None:
+    """Update the IDs of all registered services."""
+
+    get_base().service_ids = {
+        f"{domain}.{service}"
+        for domain, services in get_hass().services.async_services().items()
+        for service in services
+    }
+
+
+def patch_service_registry(domain: str, service: str, registered: bool) -> None:
+    """Add or remove a single service ID after a service is registered or removed."""
+
+    service_id = f"{domain}.{service}".lower()
+
+    if registered:
+        get_base().service_ids.add(service_id)
+    else:
+        get_base().service_ids.discard(service_id)
+
+
+def _sort_key(sort_order: int, name: Optional[str]) -> Tuple[int, str]:
+    """Key to sort by sort order and then case insensitive name."""
+
+    return (sort_order, (name or "").lower())
+
+
+def _sort(
+    views: Tuple[SortedView, SortedView],
+    id: str,
+    key: Optional[Tuple[int, str]],
+    visible: bool = True,
+) -> bool:
+    """
+    Move an ID in the sorted views of all and of visible objects, or remove it
+    if there is no key. Returns if any view changed.
+    """
+
+    all_view, visible_view = views
+
+    if key is None:
+        changed = all_view.discard(id)
+    else:
+        changed = all_view.set(id, key)
+
+    if key is None or not visible:
+        return visible_view.discard(id) or changed
+
+    return visible_view.set(id, key) or changed
+
+
+def sort_area(area_id: str, area_entry: Optional[AreaEntry] = None) -> None:
+    """Move an area to its position in the sorted area views."""
+
+    area = EnhancedArea(area_id, area_entry=area_entry)
+    key = None
+
+    if area.area_entry is not None:
+        key = _sort_key(area.sort_order, area.name)
+
+    _sort(get_base().sorted_areas, area_id, key, area.visible)
+
+
+def sort_areas() -> None:
+    """Rebuild the sorted area views."""
+
+    base = get_base()
+    base.sorted_areas = (SortedView(), SortedView())
+
+    for area in base.area_registry.values():
+        sort_area(area.id, area)
+
+
+def sort_person(person_id: str) -> None:
+    """Move a person to its position in the sorted person views."""
+
+    person = EnhancedPerson(person_id)
+    key = None
+
+    if person.person_entry is not None:
+        key = _sort_key(person.sort_order, person.name)
+
+    _sort(get_base().sorted_persons, person_id, key, person.visible)
+
+
+def sort_persons() -> None:
+    """Rebuild the sorted person views."""
+
+    base = get_base()
+    base.sorted_persons = (SortedView(), SortedView())
+
+    for person_id in base.person_registry:
+        sort_person(person_id)
+
+
+def get_area_name_matcher() -> AreaNameMatcher:
+    """Get the area name matcher, building it if the area registry changed."""
+
+    base = get_base()
+    if base.area_name_matcher is None:
+        base.area_name_matcher = AreaNameMatcher(get_area_entries())
+
+    return base.area_name_matcher
 
 
 class EnhancedArea:
@@ -78,8 +422,25 @@ class EnhancedArea:
         area_entry: Optional[AreaEntry] = None,
     ) -> None:
         self.id = id
-        self.area_settings = self._get_area_settings(area_settings)
-        self.area_entry = self._get_area_entry(area_entry)
+
+        if area_settings is not None:
+            self.area_settings = area_settings
+        if area_entry is not None:
+            self.area_entry = area_entry
+
+    @cached_property
+    def area_settings(self) -> AreaSettingsEntry:
+        """Settings for the area or an empty dictionary if there are none."""
+
+        settings = get_base().areas.get(self.id)
+
+        return settings if settings is not None else {}
+
+    @cached_property
+    def area_entry(self) -> Optional[AreaEntry]:
+        """Entry in the HA area registry if it exists."""
+
+        return get_base().area_registry.get(self.id)
 
     @property
     def name(self) -> str:
@@ -111,28 +472,29 @@ class EnhancedArea:
 
         return self.area_settings.get(CONF_VISIBLE, True)
 
-    def _get_area_settings(
-        self, area_settings: Optional[AreaSettingsEntry] = None
-    ) -> AreaSettingsEntry:
-        """If the settings are None find the settings and provide an empty dictionary if None."""
+    @property
+    def entities(self) -> List["EnhancedEntity"]:
+        """Visible and enabled entities in the area."""
 
-        settings = area_settings
-        if settings is None:
-            settings = get_base().areas.get(self.id)
+        return get_entities_in_area(self.id)
 
-        return settings if settings is not None else {}
+    @cached_property
+    def counters(self) -> Dict[str, Dict[str, int]]:
+        """Counts of visible and enabled entities, and of those that are on, per entity type."""
 
-    def _get_area_entry(
-        self, area_entry: Optional[AreaEntry] = None
-    ) -> Optional[AreaEntry]:
-        """If the entry is None, find the entry if it exists."""
+        return get_area_counters(self.id)
 
-        entry = area_entry
-        if entry is None:
-            registry: AreaRegistry = get_hass().data["area_registry"]
-            entry = registry.async_get_area(self.id)
+    @property
+    def tracked_entity_count(self) -> int:
+        """Number of visible and enabled entities in the area."""
+
+        return sum(counter[CONF_COUNT] for counter in self.counters.values())
+
+    @property
+    def something_on(self) -> int:
+        """Number of visible and enabled entities in the area that are on."""
 
-        return entry
+        return sum(counter[CONF_SOMETHING_ON] for counter in self.counters.values())
 
     def __getitem__(self, item: str) -> Any:
         """Get and attribute, needed for Jinja templates."""
@@ -174,10 +536,52 @@ class EnhancedEntity:
         device_entry: DeviceEntry = None,
     ):
         self.entity_id = entity_id
-        self.entity_settings = self._get_entity_settings(entity_settings)
-        self.entity_state = self._get_entity_state(entity_state)
-        self.entity_entry = self._get_entity_entry(entity_entry)
-        self.device_entry = self._get_device_entry(device_entry)
+        self._entity_state = entity_state
+
+        if entity_settings is not None:
+            self.entity_settings = entity_settings
+        if entity_entry is not None:
+            self.entity_entry = entity_entry
+        if device_entry is not None:
+            self.device_entry = device_entry
+
+    @cached_property
+    def entity_settings(self) -> EntitySettingsEntry:
+        """Settings for the entity or an empty dictionary if there are none."""
+
+        settings = get_base().entities.get(self.entity_id)
+
+        return settings if settings is not None else {}
+
+    @property
+    def entity_state(self) -> Optional[State]:
+        """State of the entity if it exists."""
+
+        # Not cached: entities are cached between renders and the state changes
+        # before this integration sees the state changed event.
+        if self._entity_state is not None:
+            return self._entity_state
+
+        return get_hass().states.get(self.entity_id)
+
+    @cached_property
+    def entity_entry(self) -> Optional[RegistryEntry]:
+        """Entry in the HA entity registry if it exists."""
+
+        registry: EntityRegistry = get_hass().data["entity_registry"]
+
+        return registry.async_get(self.entity_id)
+
+    @cached_property
+    def device_entry(self) -> Optional[DeviceEntry]:
+        """Entry in the HA device registry if the entity belongs to a device."""
+
+        if self.entity_entry is None or self.entity_entry.device_id is None:
+            return None
+
+        registry: DeviceRegistry = get_hass().data["device_registry"]
+
+        return registry.async_get(self.entity_entry.device_id)
 
     @property
     def area_id(self) -> Optional[str]:
@@ -269,6 +673,17 @@ class EnhancedEntity:
 
         return self.entity_entry.disabled if self.entity_entry is not None else False
 
+    @property
+    def person(self) -> Optional["EnhancedPerson"]:
+        """Person this entity tracks if it is a device tracker of a person."""
+
+        person_id = get_base().device_tracker_persons.get(self.entity_id)
+
+        if person_id is None:
+            return None
+
+        return EnhancedPerson(person_id)
+
     @property
     def state(self):
         """Wrapper for entity_state."""
@@ -281,105 +696,22 @@ class EnhancedEntity:
 
         return self.entity_entry
 
-    def _get_entity_settings(
-        self, entity_settings: Optional[EntitySettingsEntry] = None
-    ) -> EntitySettingsEntry:
-        """If the settings are None find the settings and provide an empty dictionary if None."""
-
-        settings = entity_settings
-        if entity_settings is None:
-            settings = get_base().entities.get(self.entity_id)
-
-        return settings if settings is not None else {}
-
-    def _get_entity_state(self, entity_state: Optional[State] = None) -> State:
-        """If the state is None, find the state."""
-
-        state = entity_state
-        if state is None:
-            state = get_hass().states.get(self.entity_id)
-
-        return state
-
-    def _get_device_entry(
-        self, device_entry: Optional[DeviceEntry] = None
-    ) -> Optional[DeviceEntry]:
-        """If the entry is None, find the device if it exists."""
-
-        entry = device_entry
-        if entry is None and self.entity_entry is not None:
-            registry: DeviceRegistry = get_hass().data["device_registry"]
-            entry = registry.async_get(self.entity_entry.device_id)
-
-        return entry
-
-    def _get_entity_entry(
-        self, entity_entry: Optional[RegistryEntry] = None
-    ) -> Optional[RegistryEntry]:
-        """If the entry is None, find the entry if it exists."""
-
-        entry = entity_entry
-        if entry is None:
-            registry: EntityRegistry = get_hass().data["entity_registry"]
-            entry = registry.async_get(self.entity_id)
-
-        return entry
-
     def _match_area_with_entity_id(self) -> Optional[str]:
         """
         Match and area with an entity by checking if the area name is at the
         beginning of the entity ID.
         """
 
-        areas = get_base().area_registry
-
-        if areas is None:
-            return None
-
-        for area in areas:
-            name = area.name.lower().replace(" ", "_")
-            quote = "'"
-            regex = (
-                f"(all_)?({name.replace(quote, '')}|{name.replace(quote, '_')})(_|$)"
-            )
-            if re.match(regex, self.entity_id.split(".")[-1]):
-                return area.id
-
-        return None
+        return get_area_name_matcher().match(self.entity_id.split(".")[-1])
 
     def _original_entity_type(self) -> str:
         """Entity type from defined maps in const.py or the entity domain."""
 
-        def binary_sensors() -> str:
-            return BINARY_SENSOR_CLASS_MAP.get(
-                self.state.attributes.get("device_class"),
-                BINARY_SENSOR_CLASS_MAP.get(CONF_DEFAULT, self.domain),
-            )
+        device_class = None
+        if self.entity_state is not None:
+            device_class = self.entity_state.attributes.get(ATTR_DEVICE_CLASS)
 
-        def covers() -> str:
-            return COVER_CLASS_MAP.get(
-                self.state.attributes.get("device_class"),
-                COVER_CLASS_MAP.get(CONF_DEFAULT, self.domain),
-            )
-
-        def sensors() -> str:
-            return SENSOR_CLASS_MAP.get(
-                self.state.attributes.get("device_class"),
-                SENSOR_CLASS_MAP.get(CONF_DEFAULT, self.domain),
-            )
-
-        def other() -> str:
-            return PLATFORM_MAP.get(
-                self.domain, PLATFORM_MAP.get(CONF_DEFAULT, self.domain)
-            )
-
-        switcher: Dict[str, Callable[[], str]] = {
-            "binary_sensor": binary_sensors,
-            "cover": covers,
-            "sensor": sensors,
-        }
-
-        return switcher.get(self.domain, other)()
+        return get_entity_type(self.domain, device_class)
 
     def __getitem__(self, item: str) -> Any:
         """Get and attribute, needed for Jinja templates."""
@@ -432,9 +764,33 @@ class EnhancedPerson:
         person_entry: Optional[PersonEntry] = None,
     ) -> None:
         self.id = id
-        self.person_settings = self._get_person_settings(person_settings)
-        self.person_state = self._get_person_state(person_state)
-        self.person_entry = self._get_person_entry(person_entry)
+
+        if person_settings is not None:
+            self.person_settings = person_settings
+        if person_state is not None:
+            self.person_state = person_state
+        if person_entry is not None:
+            self.person_entry = person_entry
+
+    @cached_property
+    def person_settings(self) -> PersonSettingsEntry:
+        """Settings for the person or an empty dictionary if there are none."""
+
+        settings = get_base().persons.get(self.id)
+
+        return settings if settings is not None else {}
+
+    @cached_property
+    def person_state(self) -> Optional[State]:
+        """State of the person entity if it exists."""
+
+        return get_hass().states.get(f"person.{self.id}")
+
+    @cached_property
+    def person_entry(self) -> Optional[PersonEntry]:
+        """Entry in the HA person collection if it exists."""
+
+        return get_base().person_registry.get(self.id)
 
     @property
     def entity_id(self) -> str:
@@ -476,54 +832,31 @@ class EnhancedPerson:
     def mobile_app_notify_services(self) -> List[str]:
         """Get a list of notify services associated with mobile devices"""
 
+        cache = get_base().person_notify_services
+        services = cache.get(self.id)
+
+        if services is None:
+            services = cache[self.id] = self._find_mobile_app_notify_services()
+
+        return list(services)
+
+    def _find_mobile_app_notify_services(self) -> List[str]:
+        """Find the notify services of the mobile app device trackers."""
+
         services = []
 
         for device in cast(List[str], self.person_entry[CONF_DEVICE_TRACKERS]):
-            enhanced_entity = EnhancedEntity(device)
+            enhanced_entity = get_entity(device)
             if (
                 enhanced_entity.entity_entry is not None
                 and enhanced_entity.entity_entry.platform == "mobile_app"
             ):
-                service_id = f"notify.mobile_app_{enhanced_entity.device_id}"
-                if get_hass().services.has_service(*service_id.split(".")):
-                    services.append(service_id)
+                service = f"mobile_app_{enhanced_entity.device_id}"
+                if get_hass().services.has_service(PLATFORM_NOTIFY, service):
+                    services.append(f"{PLATFORM_NOTIFY}.{service}")
 
         return services
 
-    def _get_person_settings(
-        self, person_settings: Optional[PersonSettingsEntry] = None
-    ) -> PersonSettingsEntry:
-        """If the settings are None find the settings and provide an empty dictionary if None."""
-
-        settings = person_settings
-        if settings is None:
-            settings = get_base().persons.get(self.id)
-
-        return settings if settings is not None else {}
-
-    def _get_person_state(self, person_state: Optional[State] = None) -> State:
-        """If the state is None, find the state."""
-
-        state = person_state
-        if state is None:
-            state = get_hass().states.get(f"person.{self.id}")
-
-        return state
-
-    def _get_person_entry(
-        self, person_entry: Optional[PersonEntry] = None
-    ) -> PersonEntry:
-        """If the entry is None, find the entry if it exists."""
-
-        entry = person_entry
-        if entry is None:
-            registry: PersonStorageCollection = get_hass().data[PLATFORM_PERSON][1]
-            for person in cast(Iterable[PersonEntry], registry.async_items()):
-                if person[CONF_ID] == self.id:
-                    return person
-
-        return entry
-
     def __getitem__(self, item: str) -> Any:
         """Get and attribute, needed for Jinja templates."""
 
@@ -564,64 +897,468 @@ async def websocket_get_entity_types(hass: HomeAssistant, connection: str, msg:
     connection.send_result(msg["id"], ENTITY_TYPES)
 
 
-def _areas_registry_data() -> Iterable[AreaEntry]:
-    area_registry: AreaRegistry = get_hass().data["area_registry"]
-    return sorted(area_registry.async_list_areas(), key=lambda entry: entry.name)
+def _area_registry() -> AreaRegistry:
+    return get_hass().data["area_registry"]
+
+
+def _is_visible(
+    settings: Optional[Dict[str, Any]],
+    include_hidden: bool,
+    visible: Optional[bool],
+) -> bool:
+    """Check the visible setting against the visible filter or include_hidden."""
+
+    is_visible = settings.get(CONF_VISIBLE, True) if settings is not None else True
+
+    if visible is not None:
+        return is_visible == visible
+
+    return include_hidden or is_visible
+
+
+def _states_filter(state: Optional[Union[str, Iterable[str]]]) -> Optional[Set[str]]:
+    """Normalize a state filter to a set of states."""
+
+    if state is None:
+        return None
+
+    return {state} if isinstance(state, str) else set(state)
 
 
 def get_areas(
-    area_id: str = None, include_hidden: bool = False
+    area_id: str = None,
+    include_hidden: bool = False,
+    visible: Optional[bool] = None,
+    name: Optional[str] = None,
 ) -> Union[EnhancedArea, List[EnhancedArea]]:
-    """Get all areas or a single area."""
+    """
+    Get all areas or a single area. Areas can be filtered by visibility or a
+    glob on the area name before they are built.
+    """
 
     if area_id is not None:
         return EnhancedArea(area_id)
 
+    settings = get_base().areas
+    pattern = re.compile(translate(name), re.IGNORECASE) if name is not None else None
+
     areas = []
-    for area in get_base().area_registry:
-        enhanced_area = EnhancedArea(id=area.id, area_entry=area)
-        if include_hidden or enhanced_area.visible:
+    for area in get_area_entries():
+        area_settings = settings.get(area.id)
+        if not _is_visible(area_settings, include_hidden, visible):
+            continue
+
+        enhanced_area = EnhancedArea(
+            id=area.id, area_settings=area_settings, area_entry=area
+        )
+        if pattern is None or pattern.match(enhanced_area.name):
             areas.append(enhanced_area)
 
     return areas
 
 
+def get_entity(entity_id: str) -> EnhancedEntity:
+    """Get an entity from the cache, resolving it if it is not cached."""
+
+    cache = get_base().entity_cache
+    entity = cache.get(entity_id)
+
+    if entity is None:
+        entity = cache[entity_id] = EnhancedEntity(entity_id)
+
+    return entity
+
+
+def update_entity_registry() -> None:
+    """Clear the entity cache and rebuild the entity indexes."""
+
+    base = get_base()
+    base.entity_cache = {}
+    base.entity_area_index = AttributeIndex()
+    base.entity_device_index = AttributeIndex()
+    base.entity_domain_index = AttributeIndex()
+    base.entity_type_index = AttributeIndex()
+    base.sorted_entities = (SortedView(), SortedView())
+    base.entity_counters = AggregateCounters()
+
+    for entity_id in get_hass().states.async_entity_ids():
+        index_entity(entity_id)
+
+    registry_changed(CONF_ENTITIES)
+
+
+def index_entity(entity_id: str) -> None:
+    """Update the secondary indexes for an entity."""
+
+    if is_tracking_entity_id(entity_id):
+        return
+
+    base = get_base()
+    entity = get_entity(entity_id)
+
+    if entity.entity_state is None:
+        changes = [
+            base.entity_area_index.discard(entity_id),
+            base.entity_device_index.discard(entity_id),
+            base.entity_domain_index.discard(entity_id),
+            base.entity_type_index.discard(entity_id),
+            _sort(base.sorted_entities, entity_id, None),
+        ]
+        base.entity_counters.discard(entity_id)
+
+    else:
+        device_id = None
+        if entity.entity_entry is not None:
+            device_id = entity.entity_entry.device_id
+
+        changes = [
+            base.entity_area_index.set(entity_id, entity.area_id),
+            base.entity_domain_index.set(entity_id, entity.domain),
+            base.entity_type_index.set(entity_id, entity.entity_type),
+            base.entity_device_index.set(entity_id, device_id)
+            if device_id is not None
+            else base.entity_device_index.discard(entity_id),
+            _sort(
+                base.sorted_entities,
+                entity_id,
+                _sort_key(entity.sort_order, entity.name),
+                entity.visible and not entity.disabled,
+            ),
+        ]
+        _count_entity(entity)
+
+    if any(changes):
+        registry_changed(CONF_ENTITIES)
+
+
+def _is_on(state: Optional[State]) -> bool:
+    """Check if a state counts as something being on."""
+
+    return state is not None and state.state in ON_STATES
+
+
+def _count_entity(entity: EnhancedEntity) -> None:
+    """Count a visible and enabled entity in its area and entity type."""
+
+    counters = get_base().entity_counters
+
+    if entity.entity_state is None or not entity.visible or entity.disabled:
+        counters.discard(entity.entity_id)
+        return
+
+    counters.set(
+        entity.entity_id,
+        entity.area_id,
+        entity.entity_type,
+        _is_on(entity.entity_state),
+    )
+
+
+def refresh_entity(entity_id: str) -> None:
+    """Remove an entity from the cache and update its indexes."""
+
+    get_base().entity_cache.pop(entity_id, None)
+    index_entity(entity_id)
+
+
+def update_entity_on(entity_id: str, state: Optional[State]) -> None:
+    """Update whether a counted entity is on from its new state."""
+
+    get_base().entity_counters.set_on(entity_id, _is_on(state))
+
+
+def _format_counters(counters: Dict[Any, Tuple[int, int]]) -> Dict[str, Dict[str, int]]:
+    return {
+        entity_type: {CONF_COUNT: count, CONF_SOMETHING_ON: on}
+        for entity_type, (count, on) in counters.items()
+    }
+
+
+def get_area_counters(area_id: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """Counts of tracked and on entities per entity type in an area."""
+
+    base = get_base()
+    entity_ids = base.entity_area_index.get(area_id)
+    track_registry(CONF_ENTITIES)
+    track_entity_ids(entity_ids)
+
+    return _format_counters(base.entity_counters.group(area_id))
+
+
+def get_entity_type_counters() -> Dict[str, Dict[str, int]]:
+    """Counts of tracked and on entities per entity type in all areas."""
+
+    base = get_base()
+    track_entity_ids(base.sorted_entities[1].ids)
+
+    return _format_counters(base.entity_counters.types())
+
+
+def refresh_device(device_id: str) -> None:
+    """Refresh all entities that belong to a device."""
+
+    for entity_id in get_base().entity_device_index.get(device_id):
+        refresh_entity(entity_id)
+
+
+def _query_entity_ids(
+    domain: Optional[str] = None,
+    area_id: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    state: Optional[Union[str, Iterable[str]]] = None,
+    match: Optional[str] = None,
+) -> List[str]:
+    """Find entity IDs using the indexes first, then the state and the entity ID glob."""
+
+    base = get_base()
+    hass = get_hass()
+
+    index_filters = [
+        (base.entity_domain_index, domain),
+        (base.entity_area_index, area_id),
+        (base.entity_type_index, entity_type),
+    ]
+    candidates = [
+        index.get(value) for index, value in index_filters if value is not None
+    ]
+
+    if len(candidates) > 0:
+        candidates.sort(key=len)
+        entity_ids = sorted(candidates[0].intersection(*candidates[1:]))
+    else:
+        entity_ids = [
+            entity_id
+            for entity_id in hass.states.async_entity_ids()
+            if not is_tracking_entity_id(entity_id)
+        ]
+
+    if match is not None:
+        pattern = re.compile(translate(match))
+        entity_ids = [entity_id for entity_id in entity_ids if pattern.match(entity_id)]
+
+    states = _states_filter(state)
+    if states is not None:
+        # Entities that do not match yet are used too, they can match later.
+        track_entity_ids(entity_ids)
+        entity_ids = [
+            entity_id
+            for entity_id in entity_ids
+            if getattr(hass.states.get(entity_id), "state", None) in states
+        ]
+
+    return entity_ids
+
+
+def _filter_entities(
+    entity_ids: Iterable[str],
+    include_hidden: bool,
+    include_disabled: bool,
+    visible: Optional[bool] = None,
+) -> Iterator[EnhancedEntity]:
+    """Yield the entities for a list of entity IDs, skipping hidden or disabled ones."""
+
+    settings = get_base().entities
+
+    for entity_id in entity_ids:
+        if not _is_visible(settings.get(entity_id), include_hidden, visible):
+            continue
+
+        enhanced_entity = get_entity(entity_id)
+        if include_disabled or not enhanced_entity.disabled:
+            track_entity_ids((entity_id,))
+            yield enhanced_entity
+
+
 def get_entities(
-    entity_id: str = None, include_hidden: bool = False, include_disabled: bool = False
+    entity_id: str = None,
+    include_hidden: bool = False,
+    include_disabled: bool = False,
+    domain: Optional[str] = None,
+    area_id: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    state: Optional[Union[str, Iterable[str]]] = None,
+    visible: Optional[bool] = None,
+    match: Optional[str] = None,
 ) -> Union[EnhancedEntity, List[EnhancedEntity]]:
-    """Get all or a single entity."""
+    """
+    Get all or a single entity. Entities can be filtered by domain, area,
+    entity type, state, visibility or a glob on the entity ID before they are
+    built.
+    """
 
     if entity_id is not None:
-        return EnhancedEntity(entity_id)
+        track_entity_ids((entity_id,))
+        return get_entity(entity_id)
+
+    return list(
+        iter_entities(
+            include_hidden,
+            include_disabled,
+            domain,
+            area_id,
+            entity_type,
+            state,
+            visible,
+            match,
+        )
+    )
+
+
+def iter_entities(
+    include_hidden: bool = False,
+    include_disabled: bool = False,
+    domain: Optional[str] = None,
+    area_id: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    state: Optional[Union[str, Iterable[str]]] = None,
+    visible: Optional[bool] = None,
+    match: Optional[str] = None,
+) -> Iterator[EnhancedEntity]:
+    """Yield entities one at a time, taking the same filters as get_entities."""
+
+    return _filter_entities(
+        _query_entity_ids(domain, area_id, entity_type, state, match),
+        include_hidden,
+        include_disabled,
+        visible,
+    )
 
-    entities = []
-    for entity_id in get_hass().states.async_entity_ids():
-        enhanced_entity = EnhancedEntity(entity_id)
-        if (include_hidden or enhanced_entity.visible) and (
-            include_disabled or not enhanced_entity.disabled
-        ):
-            entities.append(enhanced_entity)
 
-    return entities
+def count_entities(include_hidden: bool = False) -> int:
+    """Number of visible and enabled entities, or all entities with include_hidden."""
+
+    entity_view, visible_view = get_base().sorted_entities
+
+    return len(entity_view if include_hidden else visible_view)
+
+
+def count_areas(include_hidden: bool = False) -> int:
+    """Number of visible areas, or all areas with include_hidden."""
+
+    area_view, visible_view = get_base().sorted_areas
+
+    return len(area_view if include_hidden else visible_view)
+
+
+def count_persons(include_hidden: bool = False) -> int:
+    """Number of visible persons, or all persons with include_hidden."""
+
+    person_view, visible_view = get_base().sorted_persons
+
+    return len(person_view if include_hidden else visible_view)
+
+
+def get_entities_in_area(
+    area_id: Optional[str], include_hidden: bool = False, include_disabled: bool = False
+) -> List[EnhancedEntity]:
+    """Get all entities in an area, or the entities without an area if area_id is None."""
+
+    # Entities moving into the area only bump the entities registry.
+    track_registry(CONF_ENTITIES)
+
+    return list(
+        _filter_entities(
+            sorted(get_base().entity_area_index.get(area_id)),
+            include_hidden,
+            include_disabled,
+        )
+    )
+
+
+def get_entities_of_domain(
+    domain: str, include_hidden: bool = False, include_disabled: bool = False
+) -> List[EnhancedEntity]:
+    """Get all entities in a domain."""
+
+    return get_entities(
+        include_hidden=include_hidden, include_disabled=include_disabled, domain=domain
+    )
+
+
+def get_entities_of_type(
+    entity_type: str, include_hidden: bool = False, include_disabled: bool = False
+) -> List[EnhancedEntity]:
+    """Get all entities of an entity type."""
+
+    return get_entities(
+        include_hidden=include_hidden,
+        include_disabled=include_disabled,
+        entity_type=entity_type,
+    )
+
+
+def get_sorted_areas(include_hidden: bool = False) -> Tuple[EnhancedArea, ...]:
+    """Get areas ordered by sort order and name."""
+
+    area_view, visible_view = get_base().sorted_areas
+
+    return tuple(
+        EnhancedArea(area_id)
+        for area_id in (area_view if include_hidden else visible_view).ids
+    )
+
+
+def get_sorted_entities(include_hidden: bool = False) -> Tuple[EnhancedEntity, ...]:
+    """Get entities ordered by sort order and name, hidden includes disabled entities."""
+
+    entity_view, visible_view = get_base().sorted_entities
+    entity_ids = (entity_view if include_hidden else visible_view).ids
+    track_entity_ids(entity_ids)
+
+    return tuple(get_entity(entity_id) for entity_id in entity_ids)
+
+
+def get_sorted_persons(include_hidden: bool = False) -> Tuple[EnhancedPerson, ...]:
+    """Get persons ordered by sort order and name."""
+
+    person_view, visible_view = get_base().sorted_persons
+    person_ids = (person_view if include_hidden else visible_view).ids
+    track_entity_ids(f"{PLATFORM_PERSON}.{person_id}" for person_id in person_ids)
+
+    return tuple(EnhancedPerson(person_id) for person_id in person_ids)
 
 
 def get_persons(
-    person_id: str = None, include_hidden: bool = False
+    person_id: str = None,
+    include_hidden: bool = False,
+    visible: Optional[bool] = None,
+    state: Optional[Union[str, Iterable[str]]] = None,
 ) -> Union[EnhancedPerson, List[EnhancedPerson]]:
-    """Get all or a single person."""
+    """
+    Get all or a single person. Persons can be filtered by visibility or state
+    before they are built.
+    """
 
     if person_id is not None:
+        track_entity_ids((f"{PLATFORM_PERSON}.{person_id}",))
         return EnhancedPerson(person_id)
 
+    base = get_base()
+    hass = get_hass()
+    states = _states_filter(state)
+
     persons = []
-    for person in cast(
-        PersonRegistry,
-        cast(
-            PersonStorageCollection, get_hass().data[PLATFORM_PERSON][1]
-        ).async_items(),
-    ):
-        enhanced_person = EnhancedPerson(id=person["id"], person_entry=person)
-        if include_hidden or enhanced_person.visible:
-            persons.append(enhanced_person)
+    for person in list(base.person_registry.values()):
+        id = person[CONF_ID]
+        person_settings = base.persons.get(id)
+        if not _is_visible(person_settings, include_hidden, visible):
+            continue
+
+        track_entity_ids((f"{PLATFORM_PERSON}.{id}",))
+
+        person_state = None
+        if states is not None:
+            person_state = hass.states.get(f"{PLATFORM_PERSON}.{id}")
+            if getattr(person_state, "state", None) not in states:
+                continue
+
+        persons.append(
+            EnhancedPerson(
+                id=id,
+                person_settings=person_settings,
+                person_state=person_state,
+                person_entry=person,
+            )
+        )
 
     return persons
@@ -330,7 +330,12 @@ async def _update_entity(call: ServiceCall) -> bool:
     if await _store_data(store, data, entity_id):
         hass.bus.fire(
             EVENT_ENTITY_SETTINGS_CHANGED,
-            {CONF_ACTION: CONF_UPDATE, ATTR_AREA_ID: entity_id},
+            {
+                CONF_ACTION: CONF_UPDATE,
+                CONF_ENTITY_ID: entity_id,
+                # Deprecated: earlier versions sent the entity ID as area_id.
+                ATTR_AREA_ID: entity_id,
+            },
         )
         return True
 
@@ -5,12 +5,13 @@ from homeassistant.helpers.typing import ConfigType
 
 from .const import DOMAIN, TITLE
 from .events import setup_events
+from .profiler import setup_profiler
 from .registry import setup_registry
 from .services import setup_services
 from .settings import setup_settings
 from .share import get_base, get_configuration, get_log
-from .template import setup_template
-from .yaml_parser import setup_yaml_parser
+from .template import setup_template, setup_template_watcher
+from .yaml_parser import setup_warm_up, setup_yaml_parser
 
 
 async def setup_integration(hass: HomeAssistant) -> bool:
@@ -26,12 +27,19 @@ async def setup_integration(hass: HomeAssistant) -> bool:
         )
         return False
 
-    await setup_registry()
+    await setup_profiler()
     await setup_settings()
+
+    # Nothing from building the registry up to listening to its events may give
+    # up the event loop, or the events fired in between are missed.
+    await setup_registry()
     await setup_template()
     await setup_events()
+
+    await setup_template_watcher()
     await setup_services()
     await setup_yaml_parser()
+    await setup_warm_up()
 
     return True
 
@@ -1,5 +1,6 @@
 """Shared Integration elements."""
 from logging import Logger
+from typing import Any
 
 from homeassistant.core import HomeAssistant
 
@@ -24,6 +25,15 @@ def get_configuration() -> Configuration:
     return base.configuration
 
 
+def get_option(key: str, default: Any = None) -> Any:
+    configuration = get_configuration()
+
+    if configuration.config_type == "flow":
+        return configuration.config_entry.options.get(key, default)
+
+    return (configuration.config or {}).get(key, default)
+
+
 def get_hass() -> HomeAssistant:
     return get_base().hass
 
@@ -1,18 +1,79 @@
 """Extend the template options for HA."""
+import asyncio
+import concurrent.futures
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+from hashlib import sha1
 import jinja2
-from typing import Any, Optional
+import os
+import tempfile
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, callback
 from homeassistant.helpers.template import (
-    # RenderInfo,
     _ENVIRONMENT,
-    # _RENDER_INFO,
     regex_match,
     regex_search,
     TemplateEnvironment,
 )
-
-from .registry import get_areas, get_entities, get_persons
-from .share import get_hass
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util.async_ import run_callback_threadsafe
+
+from .registry import (
+    EnhancedArea,
+    EnhancedEntity,
+    EnhancedPerson,
+    count_areas,
+    count_entities,
+    count_persons,
+    get_areas,
+    get_entities,
+    get_entities_in_area,
+    get_entities_of_domain,
+    get_entities_of_type,
+    get_entity_type_counters,
+    get_persons,
+    get_sorted_areas,
+    get_sorted_entities,
+    get_sorted_persons,
+    iter_entities,
+)
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import (
+    BYTECODE_CACHE_MAX_SIZE,
+    CONF_AREA,
+    CONF_AREAS,
+    CONF_ENTITIES,
+    CONF_PERSONS,
+    DOMAIN,
+    SNAPSHOT_TIMEOUT,
+)
+from .loader import EnhancedFileSystemLoader
+from .profiler import profile_globals, profile_stream
+from .share import get_base, get_hass, get_log
+from .tracking import track_registry
+
+# Marks the end of a stream read through a registry snapshot.
+_STREAM_END = object()
+
+# Memoized registry lookups of the render that is running. Included templates and
+# macros of imported templates render in the same call, so they reuse the same lookups.
+_RENDER_MEMO: ContextVar[Optional[Dict[Tuple, Any]]] = ContextVar(
+    "enhanced_templates_render_memo", default=None
+)
 
 
 async def setup_template() -> None:
@@ -22,8 +83,14 @@ async def setup_template() -> None:
 
     jinja = hass.data[_ENVIRONMENT] = EnhancedTemplateEnvironment(hass)
 
-    # Add a loader so Jinja can use files.
-    jinja.loader = jinja2.FileSystemLoader("/")
+    # Add a loader so Jinja can use files, watched for changes once
+    # setup_template_watcher starts it.
+    jinja.loader = EnhancedFileSystemLoader("/")
+
+    # Keep compiled file templates between restarts.
+    jinja.bytecode_cache = EnhancedBytecodeCache(
+        hass.config.path(STORAGE_DIR, f"{DOMAIN}.bytecode")
+    )
 
     # Add the built-in HA regex filters as tests if they do not already exist
     if jinja.tests.get("regex_match") is None:
@@ -34,6 +101,12 @@ async def setup_template() -> None:
     # Add custom tests and filters
     if jinja.tests.get("service_exists") is None:
         jinja.tests["service_exists"] = service_exists
+    if jinja.filters.get("services_existing") is None:
+        jinja.filters["services_existing"] = services_existing
+    if jinja.filters.get("group_by_area") is None:
+        jinja.filters["group_by_area"] = group_by_area
+    if jinja.filters.get("group_by_type") is None:
+        jinja.filters["group_by_type"] = group_by_type
     if jinja.tests.get("truthy") is None:
         jinja.tests["truthy"] = truthy
     if jinja.filters.get("truthy") is None:
@@ -48,18 +121,48 @@ async def setup_template() -> None:
     jinja.globals["entities"] = EntitiesTemplate()
     jinja.globals["persons"] = PersonsTemplate()
     jinja.globals["service_exists"] = service_exists
+    jinja.globals["services_existing"] = services_existing
+    jinja.globals["group_by_area"] = group_by_area
+    jinja.globals["group_by_type"] = group_by_type
+
+
+async def setup_template_watcher() -> None:
+    """
+    Start watching template files for changes. Starting the watcher gives up the
+    event loop, so it is called after the event listeners are set up.
+    """
+
+    hass = get_hass()
+    loader: EnhancedFileSystemLoader = hass.data[_ENVIRONMENT].loader
+
+    if await hass.async_add_executor_job(loader.start):
+
+        @callback
+        def _stop_loader(_event: Event) -> None:
+            hass.async_add_executor_job(loader.stop)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _stop_loader)
 
 
 def service_exists(service: str = None) -> bool:
     """Tests if a service exists."""
 
-    if service in [None, ""] or "." not in service:
+    if not isinstance(service, str):
         return False
 
-    try:
-        return get_hass().services.has_service(*service.split("."))
-    except:
-        return False
+    return service.lower() in get_base().service_ids
+
+
+def services_existing(services: Optional[Iterable[str]] = None) -> List[str]:
+    """Filter a list of services down to the ones that exist."""
+
+    if services is None:
+        return []
+
+    if isinstance(services, str):
+        services = [services]
+
+    return [service for service in services if service_exists(service)]
 
 
 def truthy(obj: Any = None):
@@ -95,69 +198,478 @@ def falsy(obj: Any = None):
     return False
 
 
+def group_by_area(entities: Iterable[Any]) -> Dict[Optional[str], List[Any]]:
+    """Group entities by area ID, keeping their order."""
+
+    return _group_by(entities, "area_id")
+
+
+def group_by_type(entities: Iterable[Any]) -> Dict[Optional[str], List[Any]]:
+    """Group entities by entity type, keeping their order."""
+
+    return _group_by(entities, "entity_type")
+
+
+def _group_by(objects: Iterable[Any], attribute: str) -> Dict[Any, List[Any]]:
+    """Group objects or dictionaries by an attribute in a single pass."""
+
+    groups: Dict[Any, List[Any]] = {}
+
+    for obj in objects or []:
+        if isinstance(obj, dict):
+            key = obj.get(attribute)
+        else:
+            key = getattr(obj, attribute, None)
+        groups.setdefault(key, []).append(obj)
+
+    return groups
+
+
+def _area_tree() -> List[Dict[str, Any]]:
+    """Visible areas with their visible entities grouped by entity type."""
+
+    track_registry(CONF_ENTITIES)
+
+    areas = get_sorted_areas()
+    entity_types: Dict[str, Dict[str, List[Any]]] = {area.id: {} for area in areas}
+
+    for entity in get_sorted_entities():
+        types = entity_types.get(entity.area_id)
+        if types is not None:
+            types.setdefault(entity.entity_type, []).append(entity)
+
+    return [{CONF_AREA: area, CONF_ENTITIES: entity_types[area.id]} for area in areas]
+
+
+@contextmanager
+def render_memo(memo: Optional[Dict[Tuple, Any]] = None) -> Iterator[None]:
+    """Memoize the registry lookups of a render, unless a render is already running."""
+
+    if _RENDER_MEMO.get() is not None:
+        yield
+        return
+
+    token = _RENDER_MEMO.set(memo if memo is not None else {})
+
+    try:
+        yield
+    finally:
+        _RENDER_MEMO.reset(token)
+
+
+def _render_with_memo(render: Callable[..., str]) -> Callable[..., str]:
+    """Wrap Template.render to memoize the lookups of templates of this integration."""
+
+    @wraps(render)
+    def _render(self: jinja2.Template, *args: Any, **kwargs: Any) -> str:
+        if not isinstance(self.environment, EnhancedTemplateEnvironment):
+            return render(self, *args, **kwargs)
+
+        with render_memo():
+            return render(self, *args, **kwargs)
+
+    return _render
+
+
+class EnhancedContext(jinja2.runtime.Context):
+    """Context that binds the registry globals to the render that is running."""
+
+    def resolve_or_missing(self, key):
+        """Resolve a variable, binding registry globals to the running render."""
+
+        value = super().resolve_or_missing(key)
+
+        if isinstance(value, RegistryTemplate) and value._memo is None:
+            memo = _RENDER_MEMO.get()
+            if memo is None:
+                return value
+
+            bound = memo.get((type(value),))
+            if bound is None:
+                bound = memo[(type(value),)] = type(value)(memo)
+            return bound
+
+        return value
+
+
 class EnhancedTemplateEnvironment(TemplateEnvironment):
     """Class to override safe callables."""
 
+    context_class = EnhancedContext
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # HA compiles its templates with jinja2.Template itself instead of the
+        # template class of the environment, so the render is wrapped there.
+        if not hasattr(jinja2.Template.render, "__wrapped__"):
+            jinja2.Template.render = _render_with_memo(jinja2.Template.render)
+
     def is_safe_callable(self, obj):
         """Test if callback is safe."""
 
-        return isinstance(
-            obj, (AreasTemplate, EntitiesTemplate)
-        ) or super().is_safe_callable(obj)
+        return isinstance(obj, RegistryTemplate) or super().is_safe_callable(obj)
 
     def is_safe_attribute(self, obj, attr, value):
         """Test if attribute is safe."""
 
-        if isinstance(obj, (AreasTemplate, EntitiesTemplate)):
+        if isinstance(obj, RegistryTemplate):
             return not attr[0] == "_"
 
         return super().is_safe_attribute(obj, attr, value)
 
 
-class AreasTemplate:
+class EnhancedBytecodeCache(jinja2.BytecodeCache):
+    """
+    Store compiled templates in .storage, keyed by path, modification time and
+    Jinja version. The least recently used files are removed when the cache
+    grows over max_size bytes.
+    """
+
+    def __init__(self, directory: str, max_size: int = BYTECODE_CACHE_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_cache_key(self, name: str, filename: Optional[str] = None) -> str:
+        """Key for a template from its path, modification time and the Jinja version."""
+
+        path = filename or name
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = 0
+
+        return sha1(f"{path}|{mtime}|{jinja2.__version__}".encode()).hexdigest()
+
+    def load_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        """Load the bytecode for a bucket if it is cached."""
+
+        path = self._get_path(bucket.key)
+
+        try:
+            with open(path, "rb") as f:
+                bucket.load_bytecode(f)
+            # The modification time tracks when a file was last used.
+            os.utime(path)
+        except OSError:
+            return
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        """Write the bytecode for a bucket and evict old files if needed."""
+
+        path = self._get_path(bucket.key)
+        temp_path = None
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # A unique file per write, templates can be compiled concurrently.
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                bucket.write_bytecode(f)
+            os.replace(temp_path, path)
+        except OSError as exc:
+            get_log().warning("Unable to cache template bytecode: %s", exc)
+            if temp_path is not None:
+                self._remove(temp_path)
+            return
+
+        self._evict()
+
+    def clear(self) -> None:
+        """Remove all cached bytecode."""
+
+        for path, _, _ in self._list_files():
+            self._remove(path)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.cache")
+
+    def _list_files(self) -> List[Tuple[str, float, int]]:
+        """Cached files with their modification time and size, oldest first."""
+
+        files = []
+
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+
+        for entry in entries:
+            if not entry.name.endswith(".cache"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.path, stat.st_mtime, stat.st_size))
+
+        return sorted(files, key=lambda file: file[1])
+
+    def _evict(self) -> None:
+        """Remove the least recently used files until the cache fits in max_size."""
+
+        files = self._list_files()
+        size = sum(file[2] for file in files)
+
+        for path, _, file_size in files:
+            if size <= self.max_size:
+                break
+            self._remove(path)
+            size -= file_size
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ReplayIterator:
+    """Iterate over a stream lazily, replaying what was already read on later iterations."""
+
+    def __init__(self, iterator: Iterator) -> None:
+        self._iterator = iterator
+        self._items: List[Any] = []
+        self._done = False
+
+    def __iter__(self) -> Iterator:
+        index = 0
+
+        while True:
+            if index < len(self._items):
+                yield self._items[index]
+            elif self._done:
+                return
+            else:
+                try:
+                    item = next(self._iterator)
+                except StopIteration:
+                    self._done = True
+                    return
+                self._items.append(item)
+                yield item
+
+            index += 1
+
+
+class RegistrySnapshot(dict):
+    """
+    Render memo for renders in a worker thread. Lookups of the registry globals
+    are computed on the event loop. The areas, entities and persons they return
+    are wrapped in SnapshotModel objects, which read each field on the loop the
+    first time the render uses it. Streams are read on the loop one item at a
+    time. This way the render never reads state that the loop is changing, and
+    the loop only does the work the render needs, in small steps.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        super().__init__()
+        self._loop = loop
+
+    def compute(self, compute: Callable[[], Any]) -> Any:
+        """Compute a lookup on the event loop and wait for the wrapped result."""
+
+        future = run_callback_threadsafe(self._loop, lambda: self._wrap(compute()))
+
+        try:
+            return future.result(SNAPSHOT_TIMEOUT)
+        except concurrent.futures.TimeoutError as exc:
+            future.cancel()
+            raise HomeAssistantError(
+                "Timed out waiting for the event loop to look up registry data"
+            ) from exc
+
+    def lookup(self, model: Any, name: str) -> Any:
+        """Get an attribute of a model on the event loop, once per snapshot."""
+
+        key = (SnapshotModel, id(model), name)
+
+        # The model is kept with the result, so its id is not reused in this snapshot.
+        if key not in self:
+            self[key] = (
+                model,
+                self.compute(lambda: _call_on_loop(self, getattr(model, name))),
+            )
+
+        return self[key][1]
+
+    def _wrap(self, value: Any) -> Any:
+        """Wrap a result in objects that can be read from the worker thread."""
+
+        if isinstance(value, (EnhancedArea, EnhancedEntity, EnhancedPerson)):
+            return SnapshotModel(self, value)
+
+        if isinstance(value, ReplayIterator):
+            return ReplayIterator(self._stream(iter(value)))
+
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+
+        if isinstance(value, tuple):
+            return tuple(self._wrap(item) for item in value)
+
+        if isinstance(value, dict):
+            return {key: self._wrap(item) for key, item in value.items()}
+
+        return value
+
+    def _stream(self, iterator: Iterator) -> Iterator:
+        """Read the next item of a stream on the event loop when the render needs it."""
+
+        while True:
+            # Timed here, the render only waits for each item while it reads the stream.
+            item = profile_globals(
+                lambda: self.compute(lambda: next(iterator, _STREAM_END))
+            )
+            if item is _STREAM_END:
+                return
+            yield item
+
+
+class SnapshotModel:
+    """Area, entity or person of a registry snapshot."""
+
+    def __init__(self, snapshot: RegistrySnapshot, model: Any) -> None:
+        self._snapshot = snapshot
+        self._model = model
+
+    def __getattr__(self, name: str) -> Any:
+        if name[0] == "_":
+            raise AttributeError(name)
+
+        return self._snapshot.lookup(self._model, name)
+
+    def __getitem__(self, item: str) -> Any:
+        """Get an attribute, needed for Jinja templates."""
+
+        return getattr(self, item)
+
+    def __repr__(self) -> str:
+        return self._snapshot.lookup(self._model, "__repr__")()
+
+
+def _call_on_loop(snapshot: RegistrySnapshot, value: Any) -> Any:
+    """Make methods of a model run on the event loop when they are called."""
+
+    if not callable(value):
+        return value
+
+    return lambda *args, **kwargs: snapshot.compute(lambda: value(*args, **kwargs))
+
+
+def registry_snapshot() -> Optional[RegistrySnapshot]:
+    """New registry snapshot when running in a worker thread while the event loop runs."""
+
+    hass = get_hass()
+
+    if hass is None or not hass.loop.is_running():
+        return None
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return RegistrySnapshot(hass.loop)
+
+    return None
+
+
+class RegistryTemplate:
+    """Base class for the registry globals.
+
+    When bound to a render, each lookup is only computed the first time and
+    reused for the rest of the render.
+    """
+
+    def __init__(self, memo: Optional[Dict[Tuple, Any]] = None) -> None:
+        self._memo = memo
+
+    def _memoize(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        """Result of a lookup, computed once per render."""
+
+        self._create_template_listener()
+
+        if self._memo is None:
+            return profile_globals(compute)
+
+        if isinstance(self._memo, RegistrySnapshot):
+            compute = partial(self._memo.compute, compute)
+
+        key = (type(self), *key)
+        try:
+            if key in self._memo:
+                return self._memo[key]
+        except TypeError:
+            # Unhashable arguments, like a list of states.
+            return profile_globals(compute)
+
+        result = self._memo[key] = profile_globals(compute)
+        return result
+
+    def _create_template_listener(self):
+        """Render the template again when the registry changes."""
+
+
+class AreasTemplate(RegistryTemplate):
     """Class to expose all enhanced areas"""
 
     def __getattr__(self, id: Optional[str] = None, include_hidden: bool = False):
         """Return all the areas."""
 
-        self._create_template_listener()
-        return get_areas(id, include_hidden)
+        return self._memoize(
+            ("get", id, include_hidden), lambda: get_areas(id, include_hidden)
+        )
 
     __getitem__ = __getattr__
 
     def __iter__(self):
-        self._create_template_listener()
-        return iter(get_areas())
+        return iter(self._memoize(("get", None, False), get_areas))
 
     def __len__(self):
-        self._create_template_listener()
-        return len(get_areas())
+        return self._memoize(("len",), count_areas)
 
-    def __call__(self, id: Optional[str] = None, include_hidden: bool = False):
-        self._create_template_listener()
-        return self.__getattr__(id, include_hidden)
+    def __call__(
+        self,
+        id: Optional[str] = None,
+        include_hidden: bool = False,
+        visible: Optional[bool] = None,
+        name: Optional[str] = None,
+    ):
+        return self._memoize(
+            ("call", id, include_hidden, visible, name),
+            lambda: get_areas(id, include_hidden, visible=visible, name=name),
+        )
 
     def __repr__(self) -> str:
         """Representation of all areas."""
 
         return "<template AllAreas>"
 
-    def _create_template_listener(self):
-        pass
+    @property
+    def sorted(self):
+        """Visible areas ordered by sort order and name."""
 
-        # TODO: Figure out how to listen for changes and update entities that
-        #   use this template.
+        return self._memoize(("sorted",), get_sorted_areas)
 
-        # hass = get_hass()
-        # render_info: RenderInfo = hass.data.get(_RENDER_INFO)
+    @property
+    def sorted_all(self):
+        """All areas, including hidden ones, ordered by sort order and name."""
 
-        # if render_info is None or render_info.template is None:
-        #     return
+        return self._memoize(("sorted_all",), lambda: get_sorted_areas(True))
 
-        # hass.bus.async_listen(EVENT_AREAS_CHANGED, refresh_template)
+    @property
+    def tree(self):
+        """Visible areas, each with its visible entities grouped by entity type."""
 
+        return self._memoize(("tree",), _area_tree)
 
-class EntitiesTemplate:
+    def _create_template_listener(self):
+        """Render the template again when areas or their settings change."""
+
+        track_registry(CONF_AREAS)
+
+
+class EntitiesTemplate(RegistryTemplate):
     """Class to expose all enhanced entities."""
 
     def __getattr__(
@@ -168,40 +680,130 @@ class EntitiesTemplate:
     ):
         """Return all the entities."""
 
-        return get_entities(entity_id, include_hidden, include_disabled)
+        return self._memoize(
+            ("get", entity_id, include_hidden, include_disabled),
+            lambda: get_entities(entity_id, include_hidden, include_disabled),
+        )
 
     __getitem__ = __getattr__
 
     def __iter__(self):
-        self._create_template_listener()
-        return iter(get_entities())
+        return iter(
+            self._memoize(
+                ("iter",), lambda: ReplayIterator(profile_stream(iter_entities()))
+            )
+        )
 
     def __len__(self):
-        self._create_template_listener()
-        return len(get_entities())
+        return self._memoize(("len",), count_entities)
 
     def __call__(
         self,
         entity_id: Optional[str] = None,
         include_hidden: bool = False,
         include_disabled: bool = False,
+        domain: Optional[str] = None,
+        area_id: Optional[str] = None,
+        entity_type: Optional[str] = None,
+        state: Optional[Union[str, List[str]]] = None,
+        visible: Optional[bool] = None,
+        match: Optional[str] = None,
     ):
-        self._create_template_listener()
-        return self.__getattr__(entity_id, include_hidden, include_disabled)
+        return self._memoize(
+            (
+                "call",
+                entity_id,
+                include_hidden,
+                include_disabled,
+                domain,
+                area_id,
+                entity_type,
+                state,
+                visible,
+                match,
+            ),
+            lambda: get_entities(
+                entity_id,
+                include_hidden,
+                include_disabled,
+                domain=domain,
+                area_id=area_id,
+                entity_type=entity_type,
+                state=state,
+                visible=visible,
+                match=match,
+            ),
+        )
 
     def __repr__(self) -> str:
         """Representation of all entities."""
 
         return "<template AllEntities>"
 
+    @property
+    def sorted(self):
+        """Visible and enabled entities ordered by sort order and name."""
+
+        return self._memoize(("sorted",), get_sorted_entities)
+
+    @property
+    def sorted_all(self):
+        """All entities, including hidden and disabled ones, ordered by sort order and name."""
+
+        return self._memoize(("sorted_all",), lambda: get_sorted_entities(True))
+
+    @property
+    def counters(self):
+        """Counts of visible and enabled entities, and of those that are on, per entity type."""
+
+        return self._memoize(("counters",), get_entity_type_counters)
+
+    def in_area(
+        self,
+        area_id: Optional[str],
+        include_hidden: bool = False,
+        include_disabled: bool = False,
+    ):
+        """Return the entities in an area."""
+
+        return self._memoize(
+            ("in_area", area_id, include_hidden, include_disabled),
+            lambda: get_entities_in_area(area_id, include_hidden, include_disabled),
+        )
+
+    def of_domain(
+        self,
+        domain: str,
+        include_hidden: bool = False,
+        include_disabled: bool = False,
+    ):
+        """Return the entities in a domain."""
+
+        return self._memoize(
+            ("of_domain", domain, include_hidden, include_disabled),
+            lambda: get_entities_of_domain(domain, include_hidden, include_disabled),
+        )
+
+    def of_type(
+        self,
+        entity_type: str,
+        include_hidden: bool = False,
+        include_disabled: bool = False,
+    ):
+        """Return the entities of an entity type."""
+
+        return self._memoize(
+            ("of_type", entity_type, include_hidden, include_disabled),
+            lambda: get_entities_of_type(entity_type, include_hidden, include_disabled),
+        )
+
     def _create_template_listener(self):
-        pass
+        """Render the template again when entities are added, removed or their settings change."""
 
-        # TODO: Figure out how to listen for changes and update entities that
-        #   use this template.
+        track_registry(CONF_ENTITIES)
 
 
-class PersonsTemplate:
+class PersonsTemplate(RegistryTemplate):
     """Class to expose all enhanced persons."""
 
     def __getattr__(
@@ -211,33 +813,51 @@ class PersonsTemplate:
     ):
         """Return all persons."""
 
-        return get_persons(person_id, include_hidden)
+        return self._memoize(
+            ("get", person_id, include_hidden),
+            lambda: get_persons(person_id, include_hidden),
+        )
 
     __getitem__ = __getattr__
 
     def __iter__(self):
-        self._create_template_listener()
-        return iter(get_persons())
+        return iter(self._memoize(("get", None, False), get_persons))
 
     def __len__(self):
-        self._create_template_listener()
-        return len(get_persons())
+        return self._memoize(("len",), count_persons)
 
     def __call__(
         self,
         person_id: Optional[str] = None,
         include_hidden: bool = False,
+        visible: Optional[bool] = None,
+        state: Optional[Union[str, List[str]]] = None,
     ):
-        self._create_template_listener()
-        return self.__getattr__(person_id, include_hidden)
+        return self._memoize(
+            ("call", person_id, include_hidden, visible, state),
+            lambda: get_persons(
+                person_id, include_hidden, visible=visible, state=state
+            ),
+        )
 
     def __repr__(self) -> str:
         """Representation of all areas."""
 
         return "<template AllPersons>"
 
+    @property
+    def sorted(self):
+        """Visible persons ordered by sort order and name."""
+
+        return self._memoize(("sorted",), get_sorted_persons)
+
+    @property
+    def sorted_all(self):
+        """All persons, including hidden ones, ordered by sort order and name."""
+
+        return self._memoize(("sorted_all",), lambda: get_sorted_persons(True))
+
     def _create_template_listener(self):
-        pass
+        """Render the template again when persons or their settings change."""
 
-        # TODO: Figure out how to listen for changes and update entities that
-        #   use this template.
+        track_registry(CONF_PERSONS)
@@ -0,0 +1,111 @@
+"""Record what templates use so they render again when it changes."""
+import asyncio
+from typing import Iterable, Optional
+
+from homeassistant.const import ATTR_ENTITY_ID, EVENT_STATE_CHANGED
+from homeassistant.core import Event, HassJob, State, callback
+from homeassistant.helpers.event import TRACK_STATE_CHANGE_CALLBACKS
+from homeassistant.helpers.template import _RENDER_INFO, RenderInfo
+
+from .const import TRACKING_ENTITY_IDS
+from .share import get_base, get_hass, get_log
+
+
+def _get_render_info() -> Optional[RenderInfo]:
+    """Render info of the template rendering on the event loop.
+
+    HA only sets it for renders on the event loop. Renders in worker threads,
+    like file templates, must not add to a template rendering on the loop.
+    """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    return get_hass().data.get(_RENDER_INFO)
+
+
+def track_entity_ids(entity_ids: Iterable[str]) -> None:
+    """Record entity IDs used by the template that is rendering."""
+
+    render_info = _get_render_info()
+
+    if render_info is not None:
+        render_info.entities.update(entity_ids)
+
+
+def track_registry(registry: str) -> None:
+    """Record that the template that is rendering uses an enhanced registry."""
+
+    render_info = _get_render_info()
+
+    if render_info is not None:
+        render_info.entities.add(TRACKING_ENTITY_IDS[registry])
+
+
+def is_tracking_entity_id(entity_id: str) -> bool:
+    """Check if an entity ID is only used to track changes to a registry."""
+
+    return entity_id in TRACKING_ENTITY_IDS.values()
+
+
+@callback
+def registry_changed(registry: str) -> None:
+    """Schedule a new revision of a registry so templates using it render again."""
+
+    base = get_base()
+
+    if len(base.pending_revisions) == 0:
+        get_hass().loop.call_soon(_dispatch_revisions)
+
+    base.pending_revisions.add(registry)
+
+
+@callback
+def _dispatch_revisions() -> None:
+    """Notify the listeners of all changed registries of their new revisions."""
+
+    base = get_base()
+    # Registries changed by a listener are scheduled again instead of dropped.
+    pending, base.pending_revisions = base.pending_revisions, set()
+
+    for registry in pending:
+        revision = base.revisions[registry] = base.revisions.get(registry, 0) + 1
+        _dispatch_revision(TRACKING_ENTITY_IDS[registry], revision)
+
+
+@callback
+def _dispatch_revision(entity_id: str, revision: int) -> None:
+    """
+    Call the state change listeners of a tracking entity ID, which include the
+    template listeners, without writing a state. This keeps the revisions out of
+    the state machine, the recorder and the logbook.
+    """
+
+    hass = get_hass()
+    jobs = hass.data.get(TRACK_STATE_CHANGE_CALLBACKS, {}).get(entity_id)
+
+    if not jobs:
+        return
+
+    event = Event(
+        EVENT_STATE_CHANGED,
+        {
+            ATTR_ENTITY_ID: entity_id,
+            "old_state": State(entity_id, str(revision - 1)),
+            "new_state": State(entity_id, str(revision)),
+        },
+    )
+
+    for job in list(jobs):
+        # Like HA, a failing listener must not keep the others from rendering.
+        try:
+            if isinstance(job, HassJob):
+                hass.async_run_hass_job(job, event)
+            else:
+                hass.async_run_job(job, event)
+        except Exception:  # pylint: disable=broad-except
+            get_log().exception(
+                "Error while processing a new revision of %s", entity_id
+            )
@@ -0,0 +1,91 @@
+"""Cache of parsed YAML files, checked against the files they were parsed from."""
+from collections import OrderedDict
+from copy import deepcopy
+import os
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def get_mtime(path: str) -> Optional[int]:
+    """Modification time of a file or directory, None if it does not exist."""
+
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class Dependencies:
+    """Files and directories a parsed result depends on, with their modification times."""
+
+    def __init__(self) -> None:
+        self.paths: Dict[str, Optional[int]] = {}
+        self.cacheable = True
+
+    def add(self, path: str) -> None:
+        """Depend on a file or directory as it is now."""
+
+        if path not in self.paths:
+            self.paths[path] = get_mtime(path)
+
+    def update(self, other: "Dependencies") -> None:
+        """Depend on everything another result depends on."""
+
+        for path, mtime in list(other.paths.items()):
+            self.paths.setdefault(path, mtime)
+
+        if not other.cacheable:
+            self.cacheable = False
+
+    def changed(self) -> bool:
+        """Check if any of the files or directories changed."""
+
+        return any(get_mtime(path) != mtime for path, mtime in self.paths.items())
+
+
+class YAMLCache:
+    """Least recently used cache of parsed YAML, returning copies of the results."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Dependencies]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, Dependencies]]:
+        """Copy of a cached result and its dependencies, None if missing or changed."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+
+        result, dependencies = entry
+
+        if dependencies.changed():
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+
+        return deepcopy(result), dependencies
+
+    def set(self, key: Hashable, result: Any, dependencies: Dependencies) -> None:
+        """Cache a copy of a result."""
+
+        entry = (deepcopy(result), dependencies)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget all cached results."""
+
+        with self._lock:
+            self._entries.clear()
@@ -1,7 +1,12 @@
 """Extend the functionality of the HA YAML parser."""
+import asyncio
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
 from custom_components.enhanced_templates.const import YAML_TAG
+from hashlib import sha1
 import io
+import json
 import os
 import time
 from typing import (
@@ -10,23 +15,79 @@ from typing import (
     List,
     Optional,
     OrderedDict as OrderedDictType,
+    Tuple,
     Union,
 )
 
+from jinja2 import Template
+from jinja2.utils import LRUCache
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.template import TemplateEnvironment, _ENVIRONMENT
 from homeassistant.util.yaml import loader as hass_loader
 from homeassistant.components.lovelace import dashboard
 
-from .share import get_hass, get_log
+from .const import CONF_FAST_LOADER, INCLUDE_DIR_WORKERS, WARM_UP_SKIP_DIRS
+from .loader import EnhancedFileSystemLoader
+from .profiler import profile_load, profile_render
+from .share import get_base, get_hass, get_log, get_option
+from .template import RegistrySnapshot, registry_snapshot, render_memo
+from .yaml_cache import Dependencies, get_mtime
 
 LoadedYAML = Optional[Union[Any, OrderedDictType, List[Union[Any, List, Dict]], Dict]]
 
 
+# Registry snapshot shared by all templates rendered while parsing a file in a
+# worker thread, including the files it includes.
+_SNAPSHOT: ContextVar[Optional[RegistrySnapshot]] = ContextVar(
+    "enhanced_templates_snapshot", default=None
+)
+
+# Dependencies of the file that is being parsed.
+_DEPENDENCIES: ContextVar[Optional[Dependencies]] = ContextVar(
+    "enhanced_templates_dependencies", default=None
+)
+
+# Set in the threads of the include pool, includes in there are loaded in order.
+_IN_INCLUDE_POOL: ContextVar[bool] = ContextVar(
+    "enhanced_templates_in_include_pool", default=False
+)
+
+_INCLUDE_POOL = {"executor": None}
+
+
 class EnhancedLoader(hass_loader.SafeLineLoader):
     pass
 
 
+try:
+    CSafeLoader = hass_loader.yaml.CSafeLoader
+except AttributeError:  # pragma: no cover
+    CSafeLoader = None
+
+if CSafeLoader is not None:
+
+    class EnhancedFastLoader(CSafeLoader):
+        """
+        EnhancedLoader on top of the libyaml C loader. Nodes only get the line
+        numbers of their start marks, which is what references use.
+        """
+
+        def __init__(
+            self, stream: Any, secrets: Union[hass_loader.Secrets, None] = None
+        ) -> None:
+            super().__init__(stream)
+            self.name = getattr(stream, "name", "<unicode string>")
+            self.stream = stream
+            self.secrets = secrets
+
+
+else:
+    EnhancedFastLoader = None
+
+
 async def setup_yaml_parser() -> None:
     """Setup the YAML parser."""
 
@@ -38,8 +99,111 @@ async def setup_yaml_parser() -> None:
         "!include_dir_merge_list", _include_dir_merge_list_yaml
     )
     EnhancedLoader.add_constructor("!include_dir_named", _include_dir_named_yaml)
+    EnhancedLoader.add_constructor(
+        "!include_dir_merge_named", _include_dir_merge_named_yaml
+    )
     EnhancedLoader.add_constructor("!file", _uncache_file)
 
+    get_base().yaml_loader = EnhancedLoader
+    if get_option(CONF_FAST_LOADER, False):
+        if EnhancedFastLoader is None:
+            get_log().warning("libyaml is not available, using the Python YAML loader")
+        else:
+            EnhancedFastLoader.yaml_constructors = {**EnhancedLoader.yaml_constructors}
+            EnhancedFastLoader.yaml_multi_constructors = {
+                **EnhancedLoader.yaml_multi_constructors
+            }
+            get_base().yaml_loader = EnhancedFastLoader
+
+    @callback
+    def _stop_include_pool(_event: Event) -> None:
+        executor = _INCLUDE_POOL["executor"]
+        _INCLUDE_POOL["executor"] = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    get_hass().bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _stop_include_pool)
+
+
+async def setup_warm_up() -> None:
+    """Precompile all enhanced YAML templates in the background."""
+
+    hass = get_hass()
+
+    # The executor job is scheduled right away, there is no need to wait for it.
+    future = hass.async_add_executor_job(warm_up_templates, hass.config.config_dir)
+    future.add_done_callback(_warm_up_done)
+
+
+def _warm_up_done(future: asyncio.Future) -> None:
+    """Log when precompiling the templates failed."""
+
+    if future.cancelled():
+        return
+
+    exc = future.exception()
+    if exc is not None:
+        get_log().error("Unable to precompile templates: %s", exc)
+
+
+def warm_up_templates(config_dir: str) -> int:
+    """Compile all files starting with the YAML tag into the template cache."""
+
+    start = time.monotonic()
+    jinja: TemplateEnvironment = get_hass().data.get(_ENVIRONMENT)
+    paths = _find_tagged_files(config_dir)
+
+    # Keep room for every file template next to the other templates.
+    if jinja.cache is not None and len(paths) > jinja.cache.capacity:
+        cache = LRUCache(jinja.cache.capacity + len(paths))
+        for key, value in reversed(jinja.cache.items()):
+            cache[key] = value
+        jinja.cache = cache
+
+    count = 0
+    for path in paths:
+        try:
+            jinja.get_template(path)
+            count += 1
+        except Exception as exc:  # pylint: disable=broad-except
+            get_log().warning("Unable to precompile template %s: %s", path, exc)
+
+    get_log().info(
+        "Precompiled %s of %s templates in %.2f seconds",
+        count,
+        len(paths),
+        time.monotonic() - start,
+    )
+
+    return count
+
+
+def _find_tagged_files(config_dir: str) -> List[str]:
+    """Find all YAML files in the config directory starting with the YAML tag."""
+
+    paths: List[str] = []
+
+    for root, dirs, files in os.walk(config_dir):
+        dirs[:] = [
+            dir
+            for dir in dirs
+            if not dir.startswith(".") and dir not in WARM_UP_SKIP_DIRS
+        ]
+
+        for file in files:
+            if not file.endswith(".yaml") or file == hass_loader.SECRET_YAML:
+                continue
+
+            path = os.path.join(root, file)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    if f.readline().lower().startswith(YAML_TAG):
+                        paths.append(path)
+            except (OSError, UnicodeDecodeError):
+                continue
+
+    return paths
+
 
 def load_yaml(
     fname: str, secrets: Union[hass_loader.Secrets, None] = None, args={}
@@ -54,26 +218,145 @@ def parse_yaml(
 ) -> hass_loader.JSON_TYPE:
     """Parse a YAML file."""
 
+    snapshot = _SNAPSHOT.get()
+
+    if snapshot is None:
+        snapshot = registry_snapshot()
+        if snapshot is not None:
+            token = _SNAPSHOT.set(snapshot)
+            try:
+                return parse_yaml(fname, secrets, args)
+            finally:
+                _SNAPSHOT.reset(token)
+
+    dependencies = Dependencies()
+    token = _DEPENDENCIES.set(dependencies)
+
+    try:
+        return _parse_yaml_cached(fname, secrets, args, snapshot, dependencies)
+    finally:
+        _DEPENDENCIES.reset(token)
+        parent = _DEPENDENCIES.get()
+        if parent is not None:
+            parent.update(dependencies)
+
+
+def _parse_yaml_cached(
+    fname: str,
+    secrets: Union[hass_loader.Secrets, None],
+    args: Dict[str, Any],
+    snapshot: Optional[RegistrySnapshot],
+    dependencies: Dependencies,
+) -> hass_loader.JSON_TYPE:
+    """Parse a YAML file or take it from the cache if nothing it depends on changed."""
+
+    cache = get_base().yaml_cache
+    key = _cache_key(fname, secrets, args)
+
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            result, cached_dependencies = cached
+            dependencies.update(cached_dependencies)
+            return result
+
+    dependencies.add(os.path.abspath(fname))
+    _add_secrets_dependencies(fname, secrets, dependencies)
+
+    result = _parse_yaml(fname, secrets, args, snapshot, dependencies)
+
+    if key is not None and dependencies.cacheable:
+        cache.set(key, result, dependencies)
+
+    return result
+
+
+def _cache_key(
+    fname: str, secrets: Union[hass_loader.Secrets, None], args: Dict[str, Any]
+) -> Optional[Tuple[str, int, str, Optional[str]]]:
+    """Key of a parsed file in the cache, None if it can not be cached."""
+
+    path = os.path.abspath(fname)
+    mtime = get_mtime(path)
+
+    try:
+        args_hash = sha1(
+            json.dumps(args, sort_keys=True, default=repr).encode("utf-8")
+        ).hexdigest()
+    except (TypeError, ValueError):
+        return None
+
+    if mtime is None:
+        return None
+
+    # A new secrets object is created on every reload, so use its directory.
+    secrets_id = None
+    if secrets is not None:
+        secrets_id = str(getattr(secrets, "config_dir", id(secrets)))
+
+    return (path, mtime, args_hash, secrets_id)
+
+
+def _add_secrets_dependencies(
+    fname: str, secrets: Union[hass_loader.Secrets, None], dependencies: Dependencies
+) -> None:
+    """Depend on the secrets files that can be used by a file."""
+
+    config_dir = getattr(secrets, "config_dir", None)
+
+    if config_dir is None:
+        return
+
+    config_dir = str(config_dir)
+    directory = os.path.dirname(os.path.abspath(fname))
+
+    while directory.startswith(config_dir):
+        dependencies.add(os.path.join(directory, hass_loader.SECRET_YAML))
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+
+
+def _parse_yaml(
+    fname: str,
+    secrets: Union[hass_loader.Secrets, None],
+    args: Dict[str, Any],
+    snapshot: Optional[RegistrySnapshot],
+    dependencies: Dependencies,
+) -> hass_loader.JSON_TYPE:
+    """Render and parse a YAML file."""
+
     template: str = ""
 
     try:
-        parse = False
+        # Read the file once for both the tag check and the render or parse.
         with open(fname, encoding="utf-8") as f:
-            if f.readline().lower().startswith(YAML_TAG):
-                parse = True
+            mtime = os.fstat(f.fileno()).st_mtime
+            source = f.read()
+
+        if source[: len(YAML_TAG)].lower() == YAML_TAG:
+            # Rendered files depend on the state of HA.
+            dependencies.cacheable = False
 
-        if parse:
             jinja: TemplateEnvironment = get_hass().data.get(_ENVIRONMENT)
-            template = jinja.get_template(fname).render({**args})
+            with profile_load(fname):
+                compiled = _get_template(jinja, fname, source, mtime)
+            with profile_render(fname), render_memo(snapshot):
+                template = compiled.render({**args})
             stream = io.StringIO(template)
-            stream.name = fname
 
         else:
-            stream = open(fname, encoding="utf-8")
+            stream = io.StringIO(source)
+
+        stream.name = fname
 
         return (
             hass_loader.yaml.load(
-                stream, Loader=lambda stream: EnhancedLoader(stream, secrets)
+                stream,
+                Loader=lambda stream: (get_base().yaml_loader or EnhancedLoader)(
+                    stream, secrets
+                ),
             )
             or OrderedDict()
         )
@@ -83,6 +366,20 @@ def parse_yaml(
         raise HomeAssistantError(exc) from exc
 
 
+def _get_template(
+    jinja: TemplateEnvironment, fname: str, source: str, mtime: float
+) -> Template:
+    """Get a file template, letting the loader use the source that was already read."""
+
+    loader = jinja.loader
+
+    if not isinstance(loader, EnhancedFileSystemLoader):
+        return jinja.get_template(fname)
+
+    with loader.primed(fname, source, mtime):
+        return jinja.get_template(fname)
+
+
 def process_node(
     loader: EnhancedLoader, node: hass_loader.yaml.Node
 ) -> List[Union[str, Dict[str, Any]]]:
@@ -99,6 +396,19 @@ def process_node(
     return [fname, loader.secrets, args]
 
 
+def _find_files(directory: str, pattern: str) -> List[str]:
+    """Find files for the include directory tags and depend on the directories searched."""
+
+    dependencies = _DEPENDENCIES.get()
+
+    if dependencies is not None:
+        for root, dirs, _files in os.walk(directory, topdown=True):
+            dirs[:] = [dir for dir in dirs if not dir.startswith(".")]
+            dependencies.add(root)
+
+    return list(hass_loader._find_files(directory, pattern))
+
+
 def _include_yaml(loader: EnhancedLoader, node: hass_loader.yaml.Node) -> LoadedYAML:
     """Handle !include tag"""
 
@@ -111,6 +421,83 @@ def _include_yaml(loader: EnhancedLoader, node: hass_loader.yaml.Node) -> Loaded
         raise HomeAssistantError(exc)
 
 
+def _load_files(
+    directory: str, secrets: Union[hass_loader.Secrets, None], args: Dict[str, Any]
+) -> List[Tuple[str, hass_loader.JSON_TYPE]]:
+    """
+    Load all YAML files in a directory for the include directory tags, in the
+    order they are found. Files are loaded on the include pool unless this runs
+    on the event loop or in the pool already.
+    """
+
+    fnames = [
+        fname
+        for fname in _find_files(directory, "*.yaml")
+        if os.path.basename(fname) != hass_loader.SECRET_YAML
+    ]
+
+    if len(fnames) < 2 or _IN_INCLUDE_POOL.get() or _on_event_loop():
+        results = [_load_file(fname, secrets, args) for fname in fnames]
+    else:
+        executor = _include_pool()
+        futures = [
+            executor.submit(copy_context().run, _load_file, fname, secrets, args, True)
+            for fname in fnames
+        ]
+        results = [future.result() for future in futures]
+
+    errors = [(fname, exc) for fname, (_, exc) in zip(fnames, results) if exc]
+
+    for fname, exc in errors:
+        get_log().error("Unable to include file %s: %s", fname, exc)
+
+    if errors:
+        raise HomeAssistantError(
+            f"Unable to include {len(errors)} of {len(fnames)} files in {directory}"
+        ) from errors[0][1]
+
+    return [(fname, loaded) for fname, (loaded, _) in zip(fnames, results)]
+
+
+def _load_file(
+    fname: str,
+    secrets: Union[hass_loader.Secrets, None],
+    args: Dict[str, Any],
+    in_pool: bool = False,
+) -> Tuple[hass_loader.JSON_TYPE, Optional[Exception]]:
+    """Load a single file, returning the error instead of raising it."""
+
+    if in_pool:
+        _IN_INCLUDE_POOL.set(True)
+
+    try:
+        return load_yaml(fname, secrets, args), None
+    except Exception as exc:  # pylint: disable=broad-except
+        return None, exc
+
+
+def _include_pool() -> ThreadPoolExecutor:
+    executor = _INCLUDE_POOL["executor"]
+
+    if executor is None:
+        executor = _INCLUDE_POOL["executor"] = ThreadPoolExecutor(
+            max_workers=INCLUDE_DIR_WORKERS, thread_name_prefix="enhanced_templates"
+        )
+
+    return executor
+
+
+def _on_event_loop() -> bool:
+    """Check if this runs on an event loop, which must not wait for the include pool."""
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return True
+
+
 def _include_dir_list_yaml(
     loader: EnhancedLoader, node: hass_loader.yaml.Node
 ) -> LoadedYAML:
@@ -118,11 +505,7 @@ def _include_dir_list_yaml(
 
     node_values = process_node(loader, node)
     loc: str = os.path.join(os.path.dirname(loader.name), node_values[0])
-    return [
-        load_yaml(f, node_values[1], node_values[2])
-        for f in hass_loader._find_files(loc, "*.yaml")
-        if os.path.basename(f) != hass_loader.SECRET_YAML
-    ]
+    return [loaded for _, loaded in _load_files(loc, node_values[1], node_values[2])]
 
 
 def _include_dir_merge_list_yaml(
@@ -133,10 +516,7 @@ def _include_dir_merge_list_yaml(
     node_values = process_node(loader, node)
     loc: str = os.path.join(os.path.dirname(loader.name), node_values[0])
     merged_list: List[hass_loader.JSON_TYPE] = []
-    for fname in hass_loader._find_files(loc, "*.yaml"):
-        if os.path.basename(fname) == hass_loader.SECRET_YAML:
-            continue
-        loaded_yaml = load_yaml(fname, node_values[1], node_values[2])
+    for _, loaded_yaml in _load_files(loc, node_values[1], node_values[2]):
         if isinstance(loaded_yaml, list):
             merged_list.extend(loaded_yaml)
     return hass_loader._add_reference(merged_list, loader, node)
@@ -150,17 +530,34 @@ def _include_dir_named_yaml(
     node_values = process_node(loader, node)
     mapping: OrderedDictType = OrderedDict()
     loc: str = os.path.join(os.path.dirname(loader.name), node_values[0])
-    for fname in hass_loader._find_files(loc, "*.yaml"):
+    for fname, loaded_yaml in _load_files(loc, node_values[1], node_values[2]):
         filename = os.path.splitext(os.path.basename(fname))[0]
-        if os.path.basename(fname) == hass_loader.SECRET_YAML:
-            continue
-        mapping[filename] = load_yaml(fname, node_values[1], node_values[2])
+        mapping[filename] = loaded_yaml
+    return hass_loader._add_reference(mapping, loader, node)
+
+
+def _include_dir_merge_named_yaml(
+    loader: EnhancedLoader, node: hass_loader.yaml.Node
+) -> LoadedYAML:
+    """Handle !include_dir_merge_named tag"""
+
+    node_values = process_node(loader, node)
+    mapping: OrderedDictType = OrderedDict()
+    loc: str = os.path.join(os.path.dirname(loader.name), node_values[0])
+    for _, loaded_yaml in _load_files(loc, node_values[1], node_values[2]):
+        if isinstance(loaded_yaml, dict):
+            mapping.update(loaded_yaml)
     return hass_loader._add_reference(mapping, loader, node)
 
 
 def _uncache_file(_loader: EnhancedLoader, node: hass_loader.yaml.Node) -> str:
     """Handle !file tag"""
 
+    # Every load should get a new timestamp.
+    dependencies = _DEPENDENCIES.get()
+    if dependencies is not None:
+        dependencies.cacheable = False
+
     path = node.value
     timestamp = str(time.time())
     if "?" in path:
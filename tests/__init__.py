@@ -0,0 +1 @@
+"""Tests for the Enhanced Templates integration."""
@@ -0,0 +1,291 @@
+"""Tests for the indexes used to speed up lookups in the registries."""
+from collections import namedtuple
+
+from custom_components.enhanced_templates.index import (
+    AggregateCounters,
+    AreaNameMatcher,
+    AttributeIndex,
+    SortedView,
+)
+
+Area = namedtuple("Area", ["id", "name"])
+
+
+def test_area_name_matcher_longest_name():
+    """The longest area name at the beginning of the object ID wins."""
+
+    matcher = AreaNameMatcher(
+        [Area("living", "Living"), Area("living_room", "Living Room")]
+    )
+
+    assert matcher.match("living_room_lamp") == "living_room"
+    assert matcher.match("living_lamp") == "living"
+    assert matcher.match("all_living_room_lights") == "living_room"
+    assert matcher.match("livingroom_lamp") is None
+    assert matcher.match("kitchen_lamp") is None
+
+
+def test_area_name_matcher_apostrophes():
+    """Apostrophes in area names are dropped or replaced with an underscore."""
+
+    matcher = AreaNameMatcher([Area("kids", "Kid's Room")])
+
+    assert matcher.match("kids_room_lamp") == "kids"
+    assert matcher.match("kid_s_room_lamp") == "kids"
+
+
+def test_area_name_matcher_empty():
+    """Nothing matches without areas."""
+
+    assert AreaNameMatcher([]).match("living_room_lamp") is None
+
+
+def test_area_name_matcher_rename():
+    """A matcher built after a rename matches the new name only."""
+
+    matcher = AreaNameMatcher([Area("den", "Den")])
+    assert matcher.match("den_lamp") == "den"
+
+    matcher = AreaNameMatcher([Area("den", "Office")])
+    assert matcher.match("den_lamp") is None
+    assert matcher.match("office_lamp") == "den"
+
+
+def test_attribute_index_insert():
+    """IDs are found by their value."""
+
+    index = AttributeIndex()
+
+    assert index.set("light.a", "light")
+    assert index.set("light.b", "light")
+    assert index.set("switch.a", "switch")
+
+    assert index.get("light") == {"light.a", "light.b"}
+    assert index.get("switch") == {"switch.a"}
+    assert index.get("sensor") == frozenset()
+    assert index.value("light.a") == "light"
+    assert index.value("sensor.a", "missing") == "missing"
+    assert "light.a" in index
+    assert len(index) == 3
+    assert sorted(index) == ["light.a", "light.b", "switch.a"]
+
+
+def test_attribute_index_set_same_value():
+    """Setting the same value again does not change the index."""
+
+    index = AttributeIndex()
+    index.set("light.a", "light")
+
+    assert not index.set("light.a", "light")
+    assert index.get("light") == {"light.a"}
+
+
+def test_attribute_index_remove():
+    """Removed IDs are not found anymore and empty values are dropped."""
+
+    index = AttributeIndex()
+    index.set("light.a", "light")
+    index.set("light.b", "light")
+
+    assert index.discard("light.a")
+    assert not index.discard("light.a")
+    assert index.get("light") == {"light.b"}
+
+    assert index.discard("light.b")
+    assert index.get("light") == frozenset()
+    assert "light" not in index._ids
+    assert len(index) == 0
+
+
+def test_attribute_index_reindex():
+    """Changing the value of an ID, like a new device class, moves it."""
+
+    index = AttributeIndex()
+    index.set("binary_sensor.door", "opening")
+    index.set("binary_sensor.window", "opening")
+
+    assert index.set("binary_sensor.door", "door")
+
+    assert index.get("opening") == {"binary_sensor.window"}
+    assert index.get("door") == {"binary_sensor.door"}
+    assert index.value("binary_sensor.door") == "door"
+    assert len(index) == 2
+
+
+def test_attribute_index_none_value():
+    """IDs without a value, like entities without an area, are indexed under None."""
+
+    index = AttributeIndex()
+    index.set("light.a", None)
+
+    assert index.get(None) == {"light.a"}
+
+    index.set("light.a", "kitchen")
+    assert index.get(None) == frozenset()
+    assert index.get("kitchen") == {"light.a"}
+
+
+def test_attribute_index_get_is_a_copy():
+    """IDs returned for a value do not change when the index changes."""
+
+    index = AttributeIndex()
+    index.set("light.a", "light")
+    ids = index.get("light")
+
+    index.set("light.b", "light")
+
+    assert ids == {"light.a"}
+
+
+def test_sorted_view_insert():
+    """IDs are kept in order of their sort key, then their ID."""
+
+    view = SortedView()
+
+    assert view.set("light.c", (1, "Ceiling"))
+    assert view.set("light.a", (2, "Attic"))
+    assert view.set("light.b", (1, "Bed"))
+    assert view.set("light.d", (1, "Bed"))
+
+    assert view.ids == ("light.b", "light.d", "light.c", "light.a")
+    assert "light.a" in view
+    assert len(view) == 4
+
+
+def test_sorted_view_set_same_key():
+    """Setting the same key again does not change the view."""
+
+    view = SortedView()
+    view.set("light.a", (1, "Attic"))
+    ids = view.ids
+
+    assert not view.set("light.a", (1, "Attic"))
+    assert view.ids is ids
+
+
+def test_sorted_view_remove():
+    """Removed IDs leave the view."""
+
+    view = SortedView()
+    view.set("light.a", (1, "Attic"))
+    view.set("light.b", (1, "Bed"))
+
+    assert view.discard("light.a")
+    assert not view.discard("light.a")
+    assert view.ids == ("light.b",)
+    assert "light.a" not in view
+    assert len(view) == 1
+
+
+def test_sorted_view_rename():
+    """A new name moves the ID to its new position."""
+
+    view = SortedView()
+    view.set("light.a", (1, "Attic"))
+    view.set("light.b", (1, "Bed"))
+    view.set("light.c", (1, "Ceiling"))
+
+    assert view.set("light.a", (1, "Den"))
+
+    assert view.ids == ("light.b", "light.c", "light.a")
+    assert len(view) == 3
+
+
+def test_sorted_view_ids_do_not_change_while_streamed():
+    """IDs taken for a stream of entities keep their order when the view changes."""
+
+    view = SortedView()
+    view.set("light.a", (1, "Attic"))
+    view.set("light.b", (1, "Bed"))
+    ids = view.ids
+
+    view.set("light.0", (0, "Basement"))
+    view.discard("light.b")
+
+    assert ids == ("light.a", "light.b")
+    assert view.ids == ("light.0", "light.a")
+
+
+def test_aggregate_counters_insert():
+    """Objects are counted per group and type, and per type across groups."""
+
+    counters = AggregateCounters()
+    counters.set("light.a", "kitchen", "light", True)
+    counters.set("light.b", "kitchen", "light", False)
+    counters.set("light.c", "den", "light", True)
+    counters.set("switch.a", "kitchen", "switch", False)
+
+    assert counters.group("kitchen") == {"light": (2, 1), "switch": (1, 0)}
+    assert counters.group("den") == {"light": (1, 1)}
+    assert counters.group("attic") == {}
+    assert counters.types() == {"light": (3, 2), "switch": (1, 0)}
+    assert "light.a" in counters
+    assert sorted(counters) == ["light.a", "light.b", "light.c", "switch.a"]
+
+
+def test_aggregate_counters_set_on():
+    """Turning an object on or off only changes the on-counts."""
+
+    counters = AggregateCounters()
+    counters.set("light.a", "kitchen", "light", False)
+
+    counters.set_on("light.a", True)
+    assert counters.group("kitchen") == {"light": (1, 1)}
+
+    counters.set_on("light.a", True)
+    assert counters.types() == {"light": (1, 1)}
+
+    counters.set_on("light.a", False)
+    assert counters.group("kitchen") == {"light": (1, 0)}
+
+    # Objects that are not counted, like hidden entities, stay uncounted.
+    counters.set_on("light.b", True)
+    assert "light.b" not in counters
+    assert counters.types() == {"light": (1, 0)}
+
+
+def test_aggregate_counters_move():
+    """A new group or type moves the counts of an object."""
+
+    counters = AggregateCounters()
+    counters.set("binary_sensor.door", "hall", "opening", True)
+
+    counters.set("binary_sensor.door", "hall", "door", True)
+    assert counters.group("hall") == {"door": (1, 1)}
+    assert counters.types() == {"door": (1, 1)}
+
+    counters.set("binary_sensor.door", "garage", "door", False)
+    assert counters.group("hall") == {}
+    assert counters.group("garage") == {"door": (1, 0)}
+    assert counters.types() == {"door": (1, 0)}
+
+
+def test_aggregate_counters_remove():
+    """Removed objects are not counted and empty groups and types are dropped."""
+
+    counters = AggregateCounters()
+    counters.set("light.a", "kitchen", "light", True)
+    counters.set("light.b", "kitchen", "light", False)
+
+    counters.discard("light.a")
+    assert counters.group("kitchen") == {"light": (1, 0)}
+
+    counters.discard("light.a")
+    counters.discard("light.b")
+    assert counters.group("kitchen") == {}
+    assert counters.types() == {}
+    assert len(list(counters)) == 0
+
+
+def test_aggregate_counters_results_are_copies():
+    """Returned counts do not change when the counters change."""
+
+    counters = AggregateCounters()
+    counters.set("light.a", "kitchen", "light", False)
+    group = counters.group("kitchen")
+    types = counters.types()
+
+    counters.set_on("light.a", True)
+
+    assert group == {"light": (1, 0)}
+    assert types == {"light": (1, 0)}
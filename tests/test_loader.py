@@ -0,0 +1,44 @@
+"""Tests for the file system loader that watches template directories."""
+import os
+import time
+
+import jinja2
+
+from custom_components.enhanced_templates.loader import EnhancedFileSystemLoader
+
+
+def _wait_for(check, timeout: float = 5) -> bool:
+    end = time.monotonic() + timeout
+
+    while time.monotonic() < end:
+        if check():
+            return True
+        time.sleep(0.05)
+
+    return check()
+
+
+def test_first_template_in_directory_is_watched(tmp_path):
+    """The first template loaded from a directory is reloaded when its file changes."""
+
+    path = tmp_path / "first.j2"
+    path.write_text("one")
+
+    loader = EnhancedFileSystemLoader("/")
+    assert loader.start()
+
+    try:
+        jinja = jinja2.Environment(loader=loader)
+        template = jinja.get_template(str(path))
+        assert template.render() == "one"
+        assert str(tmp_path) in loader._watched
+
+        # Keep the modification time, so only the watch can see the change.
+        stat = os.stat(path)
+        path.write_text("two")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert _wait_for(lambda: not template.is_up_to_date)
+        assert jinja.get_template(str(path)).render() == "two"
+    finally:
+        loader.stop()
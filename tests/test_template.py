@@ -0,0 +1,93 @@
+"""Tests for the registry globals in templates."""
+import asyncio
+import threading
+
+import jinja2
+
+from custom_components.enhanced_templates.template import (
+    EnhancedTemplateEnvironment,
+    RegistrySnapshot,
+    RegistryTemplate,
+    ReplayIterator,
+)
+
+
+class CountingTemplate(RegistryTemplate):
+    """Registry global with a lookup that counts how often it is computed."""
+
+    computed = 0
+
+    @property
+    def value(self) -> int:
+        return self._memoize(("value",), self._count)
+
+    @classmethod
+    def _count(cls) -> int:
+        cls.computed += 1
+        return cls.computed
+
+
+def _environment() -> EnhancedTemplateEnvironment:
+    jinja = EnhancedTemplateEnvironment(None)
+    jinja.loader = jinja2.DictLoader(
+        {
+            "macros.j2": "{% macro value() %}{{ counter.value }}{% endmacro %}",
+            "main.j2": (
+                "{% import 'macros.j2' as macros %}"
+                "direct={{ counter.value }} macro={{ macros.value() }}"
+            ),
+        }
+    )
+    jinja.globals["counter"] = CountingTemplate()
+    CountingTemplate.computed = 0
+    return jinja
+
+
+def test_render_memo_per_render():
+    """A lookup is computed once per render and again in the next render."""
+
+    jinja = _environment()
+    template = jinja.from_string("{{ counter.value }} {{ counter.value }}")
+
+    assert template.render() == "1 1"
+    assert template.render() == "2 2"
+
+
+def test_render_memo_macro_imported_without_context():
+    """Macros of a cached module use the lookups of the render that calls them."""
+
+    jinja = _environment()
+
+    assert jinja.get_template("main.j2").render() == "direct=1 macro=1"
+    assert jinja.get_template("main.j2").render() == "direct=2 macro=2"
+
+
+def test_registry_snapshot_streams_on_the_loop():
+    """Items of a stream are read on the event loop when the render reads them."""
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+
+    read = []
+
+    def _items():
+        for item in range(3):
+            read.append(threading.current_thread())
+            yield item
+
+    try:
+        snapshot = RegistrySnapshot(loop)
+        stream = snapshot.compute(lambda: ReplayIterator(_items()))
+        assert read == []
+
+        assert next(iter(stream)) == 0
+        assert read == [thread]
+
+        assert list(stream) == [0, 1, 2]
+        assert list(stream) == [0, 1, 2]
+        assert read == [thread, thread, thread]
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
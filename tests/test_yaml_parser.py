@@ -0,0 +1,55 @@
+"""Tests for the cached YAML parser and its include tags."""
+import pytest
+
+from custom_components.enhanced_templates import yaml_parser
+from custom_components.enhanced_templates.share import get_base
+
+
+@pytest.fixture(autouse=True)
+def include_tags():
+    """Use the include tags of the integration with a clean cache."""
+
+    loader = yaml_parser.EnhancedLoader
+    constructors = dict(loader.yaml_constructors)
+    loader.yaml_constructors = {
+        **constructors,
+        "!include": yaml_parser._include_yaml,
+        "!include_dir_list": yaml_parser._include_dir_list_yaml,
+        "!include_dir_merge_list": yaml_parser._include_dir_merge_list_yaml,
+        "!include_dir_named": yaml_parser._include_dir_named_yaml,
+        "!include_dir_merge_named": yaml_parser._include_dir_merge_named_yaml,
+    }
+    get_base().yaml_cache.clear()
+
+    yield
+
+    loader.yaml_constructors = constructors
+    get_base().yaml_cache.clear()
+
+
+@pytest.mark.parametrize(
+    "tag, expected",
+    [
+        ("!include_dir_list", [{"a": 1}, {"b": 2}]),
+        ("!include_dir_merge_list", [{"a": 1}, {"b": 2}]),
+        ("!include_dir_named", {"a": {"a": 1}, "b": {"b": 2}}),
+        ("!include_dir_merge_named", {"a": 1, "b": 2}),
+    ],
+)
+def test_include_dir_picks_up_new_files(tmp_path, tag, expected):
+    """A cached file including a directory is parsed again when a file is added."""
+
+    directory = tmp_path / "items"
+    directory.mkdir()
+    content = "- a: 1" if "merge_list" in tag else "a: 1"
+    (directory / "a.yaml").write_text(content)
+    config = tmp_path / "configuration.yaml"
+    config.write_text(f"items: {tag} items\n")
+
+    first = yaml_parser.parse_yaml(str(config))
+    assert len(first["items"]) == 1
+
+    content = "- b: 2" if "merge_list" in tag else "b: 2"
+    (directory / "b.yaml").write_text(content)
+
+    assert yaml_parser.parse_yaml(str(config))["items"] == expected